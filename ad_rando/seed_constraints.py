@@ -0,0 +1,106 @@
+import hashlib
+import struct
+
+HASH_WORD = struct.Struct('!i')
+
+
+class SeedHash:  # a seed's SHA-256, computed once and shared by every constraint checking it
+    __slots__ = ('seed', 'digest', '_words')
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.digest = hashlib.sha256(str(seed).encode()).digest()
+        self._words = {}
+
+    def word(self, index):
+        # absolute value of the big-endian signed 32-bit word starting at hex index * 4 bytes, as adrando reads it
+        if index not in self._words:
+            self._words[index] = abs(HASH_WORD.unpack_from(self.digest, index * 4)[0])
+        return self._words[index]
+
+
+class HashField:  # a seed property adrando derives from its hash, e.g. the starter monster
+    def __init__(self, name, hash_index, modulo, base=0):
+        self.name = name
+        self._hash_index = hash_index
+        self._modulo = modulo
+        self._base = base
+
+    def value(self, seed_hash):
+        return self._base + seed_hash.word(self._hash_index) % self._modulo
+
+    def equals(self, value):
+        return FieldIn(self, (value,))
+
+    def one_of(self, *values):
+        return FieldIn(self, values)
+
+
+class SeedConstraint:
+    def matches(self, seed_hash):
+        raise NotImplementedError(f'{self.__class__.__name__}.{self.matches}')
+
+    def validate(self, seed):
+        return self.matches(SeedHash(seed))
+
+    def validate_many(self, seeds):
+        return [self.matches(SeedHash(seed)) for seed in seeds]
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+
+class FieldIn(SeedConstraint):
+    def __init__(self, field, values):
+        self._field = field
+        self._values = frozenset(values)
+
+    def matches(self, seed_hash):
+        return self._field.value(seed_hash) in self._values
+
+    def __repr__(self):
+        return f'{self._field.name} in {sorted(self._values)}'
+
+
+class AllOf(SeedConstraint):
+    def __init__(self, *constraints):
+        self._constraints = constraints
+
+    def matches(self, seed_hash):
+        return all(constraint.matches(seed_hash) for constraint in self._constraints)
+
+    def __repr__(self):
+        return '(' + ' & '.join(map(repr, self._constraints)) + ')'
+
+
+class AnyOf(SeedConstraint):
+    def __init__(self, *constraints):
+        self._constraints = constraints
+
+    def matches(self, seed_hash):
+        return any(constraint.matches(seed_hash) for constraint in self._constraints)
+
+    def __repr__(self):
+        return '(' + ' | '.join(map(repr, self._constraints)) + ')'
+
+
+class Not(SeedConstraint):
+    def __init__(self, constraint):
+        self._constraint = constraint
+
+    def matches(self, seed_hash):
+        return not self._constraint.matches(seed_hash)
+
+    def __repr__(self):
+        return f'~{self._constraint!r}'
+
+
+STARTER_MONSTER = HashField('starter monster', hash_index=6, modulo=45, base=1)
+HIKEWNE_MONSTER_ID = 1
+NO_HIKEWNE = ~STARTER_MONSTER.equals(HIKEWNE_MONSTER_ID)
@@ -1,7 +1,14 @@
 import hashlib
+import json
 import math
+import os
+import calendar
 import struct
 import time
+from collections import deque
+
+from ad_rando.seed_constraints import NO_HIKEWNE
+from ad_rando.seed_store import SeedStore
 
 
 class CurryError(BaseException):
@@ -10,12 +17,18 @@ class CurryError(BaseException):
 
 
 class SeedGenerator:
-    def __init__(self, validator):
+    def __init__(self, validator, partition=None):
         self._validator = validator
         self._seed_base = time.time() * 1000
         self._seed_floor = math.floor(self._seed_base)
         # Use the nanosecond portion of the time as a pseudo-random offset, plus a constant in case that happens to be 0
         self._offset = math.floor((self._seed_base - self._seed_floor) * 1000) + 50
+        if partition is not None:
+            # partition is (this worker's index, number of workers): with the offset a multiple of the number of
+            # workers and the floor moved down onto the index, every seed a worker tries is its own
+            index, count = partition
+            self._offset = -(-self._offset // count) * count
+            self._seed_floor -= (self._seed_floor - index) % count
         self._index = 0
 
     def next(self):
@@ -24,32 +37,101 @@ class SeedGenerator:
             seed = self._generate()
         return seed
 
+    def candidates(self, count):
+        seeds = range(self._seed_floor - self._offset * self._index,
+                      self._seed_floor - self._offset * (self._index + count),
+                      -self._offset)
+        self._index += count
+        return list(seeds)
+
     def _generate(self):
         seed = self._seed_floor - self._offset * self._index
         self._index += 1
         return seed
 
 
+class SeedSearch:
+    DEFAULT_CHUNK_SIZE = 256
+
+    def __init__(self, validator, chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+        # with an executor (e.g. a ProcessPoolExecutor) chunks are validated in parallel, otherwise in-process
+        self._validator = validator
+        self._chunk_size = chunk_size
+        self._executor = executor
+
+    def find(self, seed_generator, count):
+        # returns the same seeds, in the same order, as calling seed_generator.next() count times
+        if self._executor is None:
+            return self._find_serial(seed_generator, count)
+        return self._find_parallel(seed_generator, count)
+
+    def _find_serial(self, seed_generator, count):
+        found = []
+        while len(found) < count:
+            found.extend(_valid_seeds(self._validator, seed_generator.candidates(self._chunk_size)))
+        return found[:count]
+
+    def _find_parallel(self, seed_generator, count):
+        in_flight = 2 * getattr(self._executor, '_max_workers', 1)
+        pending = deque(self._submit(seed_generator) for _ in range(in_flight))
+        found = []
+        while len(found) < count:
+            found.extend(pending.popleft().result())
+            pending.append(self._submit(seed_generator))
+        for future in pending:
+            future.cancel()
+        return found[:count]
+
+    def _submit(self, seed_generator):
+        return self._executor.submit(_valid_seeds, self._validator, seed_generator.candidates(self._chunk_size))
+
+
+def _valid_seeds(validator, seeds):
+    return [seed for seed, valid in zip(seeds, validator.validate_many(seeds)) if valid]
+
+
 class SeedsGenerator:
     ADRANDO_BASE = 'https://adrando.com/'
 
-    def __init__(self, randomizer_params, validator, seeds_number):
+    def __init__(self, randomizer_params, validator, seeds_number, seed_pool=None, seed_store=None):
         self._randomizer_params = randomizer_params
         self._validator = validator
         self._seeds_number = seeds_number
-
-    def generate(self):
-        seed_generator = SeedGenerator(self._validator)
-        return [self._create_adrando_link(seed_generator.next()) for _ in range(self._seeds_number)]
-
-    def _create_adrando_link(self, seed):
-        return f"{self.ADRANDO_BASE}?{self._randomizer_params.params()},,{seed}"
+        self._seed_pool = seed_pool
+        self._seed_store = seed_store
+
+    def generate(self, executor=None):
+        # a generator is seeded from the clock, so after a restart or reload it can come back to seeds handed out
+        # before; the seed store remembers every link it saved, and those are skipped
+        seed_generator = None
+        links = []
+        while len(links) < self._seeds_number:
+            missing = self._seeds_number - len(links)
+            if self._seed_pool is not None:
+                seeds = self._seed_pool.take(missing)
+            else:
+                seed_generator = seed_generator or SeedGenerator(self._validator)
+                seeds = SeedSearch(self._validator, executor=executor).find(seed_generator, missing)
+            fresh = [self._randomizer_params.link(seed) for seed in seeds]
+            if self._seed_store is not None:
+                issued = self._seed_store.issued(fresh)
+                fresh = [link for link in fresh if link not in issued]
+            links.extend(fresh)
+        return links
 
 
 class AdRandomizerParams:
+    _link_prefix = None
+
     def params(self):
         raise NotImplementedError(f'{self.__class__.__name__}.{self.params}')
 
+    def link(self, seed):
+        # everything before the seed is the same for every link, so it's formatted once per params object
+        if self._link_prefix is None:
+            self._link_prefix = f"{SeedsGenerator.ADRANDO_BASE}?{self.params()},,"
+        return self._link_prefix + str(seed)
+
 
 class FromPresetRandomizerParams(AdRandomizerParams):
     def __init__(self, preset_name):
@@ -71,20 +153,38 @@ class SeedValidator:
     def validate(self, seed):
         raise NotImplementedError(f'{self.__class__.__name__}.{self.validate}')
 
+    def validate_many(self, seeds):
+        return [self.validate(seed) for seed in seeds]
+
 
 class NoRestrictionsSeedValidator(SeedValidator):
     def validate(self, seed):
         return True
 
+    def validate_many(self, seeds):
+        return [True] * len(seeds)
+
 
 class NoHiKewneSeedValidator(SeedValidator):
     STARTER_MONSTER_HASH_HEX_INDEX = 6
     MONSTERS_NUMBER = 45
     HIKEWNE_MONSTER_ID = 1
 
+    STARTER_MONSTER_HASH_WORD = struct.Struct('!i')
+
     def validate(self, seed):
         return self._calculate_starter_monster_id(self._calculate_sha256(seed)) != self.HIKEWNE_MONSTER_ID
 
+    def validate_many(self, seeds):
+        # same computation as validate, with the attribute lookups hoisted out of the per-seed loop
+        sha256 = hashlib.sha256
+        unpack_from = self.STARTER_MONSTER_HASH_WORD.unpack_from
+        offset = self.STARTER_MONSTER_HASH_HEX_INDEX * 4
+        monsters_number = self.MONSTERS_NUMBER
+        hikewne_monster_id = self.HIKEWNE_MONSTER_ID
+        return [1 + abs(unpack_from(sha256(str(seed).encode()).digest(), offset)[0]) % monsters_number != hikewne_monster_id
+                for seed in seeds]
+
     def _calculate_sha256(self, seed):
         m = hashlib.sha256()
         m.update(str.encode(str(seed)))
@@ -99,6 +199,131 @@ class NoHiKewneSeedValidator(SeedValidator):
         return int(math.fabs(struct.unpack('!i', seed_hash[seed_hash_start_byte:seed_hash_end_byte])[0]))
 
 
+class Preset:
+    __slots__ = ('name', 'description', 'params', 'validator', 'category', 'tournament')
+
+    def __init__(self, name, description, params, validator, category, tournament=None):
+        self.name = name
+        self.description = description
+        self.params = params
+        self.validator = validator
+        self.category = category
+        self.tournament = tournament
+
+
+class _TrieNode:
+    __slots__ = ('children', 'name', 'only', 'count')
+
+    def __init__(self):
+        self.children = {}
+        self.name = None  # the preset named exactly by the path to this node
+        self.only = None  # the preset, when just one starts with the path to this node
+        self.count = 0
+
+
+class PresetTrie:  # preset names by letter, so a prefix resolves in one walk down the query
+    def __init__(self, names):
+        self._root = _TrieNode()
+        for name in names:
+            self._add(name)
+
+    def _add(self, name):
+        node = self._root
+        path = [node]
+        for letter in name:
+            node = node.children.setdefault(letter, _TrieNode())
+            path.append(node)
+        node.name = name
+        for node in path:
+            node.only = name if node.count == 0 else None
+            node.count += 1
+
+    def resolve(self, prefix):
+        # the preset the prefix names exactly, else the only one it starts, else None
+        node = self._root
+        for letter in prefix:
+            node = node.children.get(letter)
+            if node is None:
+                return None
+        return node.name or node.only
+
+
+class PresetCatalogue:  # every preset, built once; tournaments can add more in PRESETS_PATH without a code change
+    PRESETS_PATH = 'ad_rando/presets.json'
+    VALIDATORS = {
+        'none': NoRestrictionsSeedValidator(),
+        'no_hikewne': NO_HIKEWNE,
+    }
+    _default = None
+
+    def __init__(self, presets):
+        # later presets replace earlier ones with the same name
+        self._presets = {}
+        for preset in presets:
+            self._presets[preset.name] = preset
+        self._trie = PresetTrie(self._presets)
+
+    @classmethod
+    def default(cls):
+        if cls._default is None:
+            presets = AdRandomizerParamsDescriptorSelector.builtin_presets()
+            if os.path.exists(cls.PRESETS_PATH):
+                try:
+                    with open(cls.PRESETS_PATH, 'r') as f:
+                        presets += cls.parse(f.read(), cls.PRESETS_PATH)
+                except ValueError as e:
+                    print(f"Could not load the extra presets, using the built-in ones: {e}")
+            cls._default = cls(presets)
+        return cls._default
+
+    @classmethod
+    def parse(cls, text, path):
+        # a list of {"name", "description", "params", "validator", "category", "tournament"}; without params the
+        # preset is one adrando.com already knows by name, and the validator defaults to none
+        entries = json.loads(text)
+        if not isinstance(entries, list):
+            raise ValueError(f"{path} must be a list of presets")
+        presets = []
+        for position, entry in enumerate(entries, 1):
+            if not isinstance(entry, dict) or not isinstance(entry.get('name'), str) \
+                    or not isinstance(entry.get('description'), str):
+                raise ValueError(f"{path}: preset {position} needs a name and a description")
+            name = entry['name'].lower()
+            # a number or list here would only fail later, when someone lists or rolls the preset
+            for field in ('params', 'validator', 'category', 'tournament'):
+                if entry.get(field) is not None and not isinstance(entry[field], str):
+                    raise ValueError(f"{path}: {field} of preset {position} ({name}) must be a string")
+            validator = cls.VALIDATORS.get(entry.get('validator', 'none'))
+            if validator is None:
+                raise ValueError(f"{path}: {name} has an unknown validator, expected one of {', '.join(cls.VALIDATORS)}")
+            params = ManualRandomizerParams(entry['params']) if entry.get('params') else FromPresetRandomizerParams(name)
+            presets.append(Preset(name, entry['description'], params, validator,
+                                  entry.get('category', 'tournament'), entry.get('tournament')))
+        return presets
+
+    def resolve(self, searched_preset_name):
+        name = self._trie.resolve(searched_preset_name.lower())
+        if name is None:
+            raise CurryError("That doesn't look like a seed or preset. Curry.")
+        return self._presets[name]
+
+    def presets(self, group=None):
+        # group is a category or tournament name, matched case-insensitively
+        if group is None:
+            return list(self._presets.values())
+        group = group.lower()
+        return [preset for preset in self._presets.values()
+                if preset.category.lower() == group or (preset.tournament or '').lower() == group]
+
+    def groups(self):
+        categories = sorted({preset.category for preset in self._presets.values()})
+        tournaments = sorted({preset.tournament for preset in self._presets.values() if preset.tournament})
+        return categories, tournaments
+
+    def validators(self):
+        return {preset.name: preset.validator for preset in self._presets.values()}
+
+
 class AdRandomizerParamsDescriptorSelector:
     ADRANDO_PRESETS = {
         'secondtower': 'Only Second Tower',
@@ -109,99 +334,162 @@ class AdRandomizerParamsDescriptorSelector:
         'rm3t3': (
             'RM3T #3 Random Toolkit Tournament',
             ManualRandomizerParams('dE:-2,fh:1,iInS:0,txX'),
-            NoHiKewneSeedValidator()
+            NO_HIKEWNE,
+            'RM3T'
         ),
         'randomtoolkit': (
             'RM3T #6 Random Toolkit Tournament',
             ManualRandomizerParams('dE:-2,fh:1,iIlnS:0,tux'),
-            NoHiKewneSeedValidator()
+            NO_HIKEWNE,
+            'RM3T'
         ),
         'sde': (
             'RM3T #5 Random Toolkit Tournament 2: State Display Edition',
             ManualRandomizerParams('BdDE:-2,fh:1,iIlnS:0,txX'),
-            NoHiKewneSeedValidator()
+            NO_HIKEWNE,
+            'RM3T'
         ),
         'riders': (
             'Riders of the Sky Tournament',
             ManualRandomizerParams('cdfFiltux'),
-            NoRestrictionsSeedValidator()
+            NoRestrictionsSeedValidator(),
+            'Riders of the Sky'
         ),
         'roche': (
             'Passionate Roche Tournament',
             ManualRandomizerParams('dE:-2,fh:1,HiIlnS:0,tx'),
-            NoHiKewneSeedValidator()
+            NO_HIKEWNE,
+            'Passionate Roche'
         )
     }
 
     @classmethod
     def select(cls, searched_preset_name):
-        def matches_preset(preset):
-            preset_name, _ = preset
-            return preset_name.startswith(searched_preset_name.lower())
-
-        def matches_preset_exactly(preset):
-            preset_name, _ = preset
-            return preset_name == searched_preset_name.lower()
-
-        matching_presets = list(filter(matches_preset, cls.all_presets().items()))
-        if len(matching_presets) > 1:
-            matching_presets = list(filter(matches_preset_exactly, matching_presets))
-        if len(matching_presets) != 1:
-            raise CurryError("That doesn't look like a seed or preset. Curry.")
-        matching_preset = matching_presets[0]
-        _, descriptor = matching_preset
+        _, descriptor = cls.resolve(searched_preset_name)
         return descriptor
 
+    @classmethod
+    def resolve(cls, searched_preset_name):
+        preset = PresetCatalogue.default().resolve(searched_preset_name)
+        return preset.name, (preset.description, preset.params, preset.validator)
+
+    @classmethod
+    def validators(cls):
+        return PresetCatalogue.default().validators()
+
     @classmethod
     def all_presets(cls):
-        presets = cls._adrando_presets()
-        presets.update(cls.MANUAL_PRESETS)
-        return presets
+        return {preset.name: (preset.description, preset.params, preset.validator)
+                for preset in PresetCatalogue.default().presets()}
 
     @classmethod
-    def _adrando_presets(cls):
-        return dict(
-            (preset_name, (description, FromPresetRandomizerParams(preset_name), NoRestrictionsSeedValidator()))
-            for preset_name, description
-            in cls.ADRANDO_PRESETS.items())
+    def builtin_presets(cls):
+        # manual presets come last, so they replace adrando.com presets of the same name
+        presets = [Preset(preset_name, description, FromPresetRandomizerParams(preset_name),
+                          NoRestrictionsSeedValidator(), 'adrando')
+                   for preset_name, description in cls.ADRANDO_PRESETS.items()]
+        presets += [Preset(preset_name, description, params, validator, 'tournament', tournament)
+                    for preset_name, (description, params, validator, tournament) in cls.MANUAL_PRESETS.items()]
+        return presets
 
 
 class AdrandoCommandHandler:
-    RANDO_LINKS = [SeedsGenerator.ADRANDO_BASE]
+    SEED_STORE_PATH = 'ad_rando/seeds.db'
+    HISTORY_LENGTH = 5
+    MAX_HISTORY_LENGTH = 20
+    _default_seed_store = None
 
-    def __init__(self, args):
+    def __init__(self, args, guild_id=0, channel_id=0, seed_store=None, seed_pools=None):
         self._args = args
+        self._guild_id = guild_id
+        self._channel_id = channel_id
+        self._seed_store = seed_store or self.default_seed_store()
+        self._seed_pools = seed_pools
+
+    @classmethod
+    def default_seed_store(cls):
+        if cls._default_seed_store is None:
+            cls._default_seed_store = SeedStore(cls.SEED_STORE_PATH)
+        return cls._default_seed_store
+
+    @classmethod
+    def close_default_seed_store(cls):
+        # a reloaded module opens its own, so the old connection would otherwise be left open
+        if cls._default_seed_store is not None:
+            cls._default_seed_store.close()
+            cls._default_seed_store = None
 
     def handle(self):
         if len(self._args) == 0:
             return self._current_rando_seed_links()
         preset_name = self._args[0]
         if preset_name.startswith('preset'):
-            return self._available_presets()
+            return self._available_presets(' '.join(self._args[1:]) or None)
+        elif preset_name == 'history':
+            return self._seed_history(self._args[1] if len(self._args) > 1 else None)
         else:
             return self._generate_seeds(preset_name)
 
     def _current_rando_seed_links(self):
-        return ['Current adrando seed links:'] + [f"Seed {i + 1}: <{link}>" for i, link in enumerate(self.RANDO_LINKS)]
-
-    def _available_presets(self):
-        return [
-            f"Preset: {preset}, Description: {description}"
-            for preset, (description, _, _)
-            in AdRandomizerParamsDescriptorSelector.all_presets().items()
-            ]
+        seed_set = self._seed_store.current(self._guild_id, self._channel_id)
+        links = seed_set.links if seed_set else [SeedsGenerator.ADRANDO_BASE]
+        return ['Current adrando seed links:'] + self._seed_links(links)
+
+    def _seed_history(self, day=None):
+        # day is a UTC date, e.g. that of last week's race; without one the latest sets are listed
+        if day is None:
+            seed_sets = self._seed_store.history(self._guild_id, self._channel_id, limit=self.HISTORY_LENGTH)
+            if not seed_sets:
+                return ['No seeds have been generated in this channel yet.']
+        else:
+            try:
+                since = calendar.timegm(time.strptime(day, '%Y-%m-%d'))
+            except ValueError:
+                return [f"I don't know the date {day}. Dates look like 2024-01-31."]
+            seed_sets = self._seed_store.history(self._guild_id, self._channel_id, since, since + 24 * 60 * 60,
+                                                 limit=self.MAX_HISTORY_LENGTH)
+            if not seed_sets:
+                return [f"No seeds were generated in this channel on {day}."]
+        responses = []
+        for seed_set in seed_sets:
+            generated_at = time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime(seed_set.created_at))
+            responses.append(f"{seed_set.preset} seeds from {generated_at}:")
+            responses.extend(self._seed_links(seed_set.links))
+        return responses
+
+    @staticmethod
+    def _seed_links(links):
+        return [f"Seed {i + 1}: <{link}>" for i, link in enumerate(links)]
+
+    def _available_presets(self, group=None):
+        catalogue = PresetCatalogue.default()
+        presets = catalogue.presets(group)
+        if not presets:
+            return [f"I don't know any {group} presets. Type '!adrando presets' to list them all."]
+        responses = [f"Preset: {preset.name}, Description: {preset.description}" for preset in presets]
+        if group is None:
+            categories, tournaments = catalogue.groups()
+            responses.append(f"Type '!adrando presets <category or tournament>' to list fewer. "
+                             f"Categories: {', '.join(categories)}. Tournaments: {', '.join(tournaments)}.")
+        return responses
 
     def _generate_seeds(self, preset_name):
         try:
-            params_descriptor = AdRandomizerParamsDescriptorSelector.select(preset_name)
-            description, params, validator = params_descriptor
+            preset = PresetCatalogue.default().resolve(preset_name)
             seeds_number = self._parse_seeds_number()
-            AdrandoCommandHandler.RANDO_LINKS = SeedsGenerator(params, validator, seeds_number).generate()
-            return [f"Generating {seeds_number} {description} seed{'s' if seeds_number>1 else ''}..."] + \
+            links = SeedsGenerator(preset.params, preset.validator, seeds_number, self._seed_pool(preset.name),
+                                   self._seed_store).generate()
+            self._seed_store.save(self._guild_id, self._channel_id, preset.name, links)
+            return [f"Generating {seeds_number} {preset.description} seed{'s' if seeds_number>1 else ''}..."] + \
                 self._current_rando_seed_links()
         except CurryError as exc:
             return [exc.error_message, "Rando seed links NOT updated"]
 
+    def _seed_pool(self, preset_name):
+        if self._seed_pools is not None and self._seed_pools.has_pool(preset_name):
+            return self._seed_pools.pool(preset_name)
+        return None
+
     def _parse_seeds_number(self):
         DEFAULT_SEEDS_NUMBER = 1
         MAX_SEEDS_NUMBER = 7
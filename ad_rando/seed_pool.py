@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from collections import deque
+
+from ad_rando.seed_generator import SeedGenerator, SeedSearch
+
+
+class SeedPool:  # pre-validated seeds for one preset, handed out at most once each
+    def __init__(self, validator, low_water, high_water, on_low=None, partition=None):
+        self._validator = validator
+        self._low_water = low_water
+        self._high_water = high_water
+        self._seeds = deque()
+        # a single generator per preset only ever moves forward, so no seed can be produced twice
+        self._seed_generator = SeedGenerator(validator, partition)
+        self._generator_lock = threading.Lock()
+        self._on_low = on_low
+        self.issued = 0
+        self.misses = 0
+        self.refills = 0
+
+    def __len__(self):
+        return len(self._seeds)
+
+    def needs_refill(self):
+        return len(self._seeds) < self._low_water
+
+    def take(self, count):
+        seeds = []
+        while len(seeds) < count:
+            try:
+                seeds.append(self._seeds.popleft())
+            except IndexError:
+                self.misses += 1
+                seeds.extend(self._generate(count - len(seeds)))
+        self.issued += count
+        if self._on_low is not None and self.needs_refill():
+            self._on_low()
+        return seeds
+
+    def refill(self):
+        missing = self._high_water - len(self._seeds)
+        if missing > 0:
+            self._seeds.extend(self._generate(missing))
+            self.refills += 1
+
+    def _generate(self, count):
+        with self._generator_lock:
+            return SeedSearch(self._validator).find(self._seed_generator, count)
+
+
+class SeedPools:
+    DEFAULT_LOW_WATER = 14
+    DEFAULT_HIGH_WATER = 28
+    REFILL_INTERVAL = 60
+
+    def __init__(self, validators, low_water=DEFAULT_LOW_WATER, high_water=DEFAULT_HIGH_WATER, partition=None):
+        # validators maps preset name -> seed validator; partition is (this worker's index, number of workers)
+        # when several processes hand out seeds at once
+        self._wakeup = None
+        self._pools = {preset_name: SeedPool(validator, low_water, high_water, on_low=self.wake, partition=partition)
+                       for preset_name, validator in validators.items()}
+
+    def pool(self, preset_name):
+        return self._pools[preset_name]
+
+    def has_pool(self, preset_name):
+        return preset_name in self._pools
+
+    def wake(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self, interval=REFILL_INTERVAL):
+        if self._wakeup is not None:
+            return  # already running, e.g. on_ready fired again after a reconnect
+        loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while True:
+            self._wakeup.clear()
+            for pool in self._pools.values():
+                if pool.needs_refill():
+                    await loop.run_in_executor(None, pool.refill)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def metrics(self):
+        return {preset_name: {'depth': len(pool), 'issued': pool.issued, 'misses': pool.misses, 'refills': pool.refills}
+                for preset_name, pool in self._pools.items()}
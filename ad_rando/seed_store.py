@@ -0,0 +1,74 @@
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seed_sets (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    channel_id INTEGER NOT NULL,
+    preset TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seeds (
+    set_id INTEGER NOT NULL REFERENCES seed_sets (id),
+    position INTEGER NOT NULL,
+    link TEXT NOT NULL,
+    PRIMARY KEY (set_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS seed_sets_by_channel ON seed_sets (guild_id, channel_id, created_at);
+CREATE INDEX IF NOT EXISTS seeds_by_link ON seeds (link);
+"""
+
+
+class SeedSet:
+    def __init__(self, preset, created_at, links):
+        self.preset = preset
+        self.created_at = created_at
+        self.links = links
+
+
+class SeedStore:  # seed sets per guild and channel, with their history
+    def __init__(self, path):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(SCHEMA)
+
+    def save(self, guild_id, channel_id, preset, links, created_at=None):
+        # the set and all of its seeds are written in one transaction
+        with self._connection:
+            cursor = self._connection.execute(
+                'INSERT INTO seed_sets (guild_id, channel_id, preset, created_at) VALUES (?, ?, ?, ?)',
+                (guild_id, channel_id, preset, time.time() if created_at is None else created_at))
+            set_id = cursor.lastrowid
+            self._connection.executemany('INSERT INTO seeds (set_id, position, link) VALUES (?, ?, ?)',
+                                         [(set_id, position, link) for position, link in enumerate(links)])
+        return set_id
+
+    def current(self, guild_id, channel_id):
+        row = self._connection.execute(
+            'SELECT id, preset, created_at FROM seed_sets WHERE guild_id = ? AND channel_id = ? '
+            'ORDER BY created_at DESC LIMIT 1', (guild_id, channel_id)).fetchone()
+        return self._seed_set(*row) if row else None
+
+    def history(self, guild_id, channel_id, since=None, until=None, limit=10):
+        rows = self._connection.execute(
+            'SELECT id, preset, created_at FROM seed_sets WHERE guild_id = ? AND channel_id = ? '
+            'AND created_at >= ? AND created_at < ? ORDER BY created_at DESC LIMIT ?',
+            (guild_id, channel_id, since or 0, until or float('inf'), limit)).fetchall()
+        return [self._seed_set(*row) for row in rows]
+
+    def issued(self, links):
+        # the links among these that have already been handed out, in this process or any earlier one
+        links = list(links)
+        if not links:
+            return set()
+        rows = self._connection.execute(
+            'SELECT link FROM seeds WHERE link IN ({})'.format(', '.join('?' * len(links))), links).fetchall()
+        return {link for link, in rows}
+
+    def close(self):
+        self._connection.close()
+
+    def _seed_set(self, set_id, preset, created_at):
+        links = [link for link, in self._connection.execute(
+            'SELECT link FROM seeds WHERE set_id = ? ORDER BY position', (set_id,))]
+        return SeedSet(preset, created_at, links)
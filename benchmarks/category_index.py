@@ -0,0 +1,50 @@
+# Compares the trigram CategoryIndex against the old linear difflib scan over synthetic category names.
+# Run from the repository root with: python -m benchmarks.category_index [number of categories]
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+from speedrunapi.category_index import CategoryIndex
+
+WORDS = ['any%', '100%', 'low%', 'glitchless', 'second tower', 'all familiars', 'no warp', 'kewne', 'koh',
+         'beginner', 'new game+', 'max level', 'ps1', 'saturn', 'gba', 'ds', 'race', 'tournament', 'curry', 'item']
+
+
+def synthetic_names(count, rng):
+    names = set()
+    while len(names) < count:
+        names.add(' - '.join(rng.sample(WORDS, rng.randint(1, 3))))
+    return sorted(names)
+
+
+def typo(name, rng):
+    position = rng.randrange(len(name))
+    return name[:position] + name[position + 1:]
+
+
+def main(count):
+    rng = random.Random(0)
+    names = synthetic_names(count, rng)
+    queries = [typo(rng.choice(names), rng) for _ in range(200)]
+
+    start = time.perf_counter()
+    index = CategoryIndex()
+    for name in names:
+        index.add(name, name)
+    built = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    indexed = time.perf_counter()
+    for query in queries:
+        max(names, key=lambda name: SequenceMatcher(None, query.lower(), name.lower()).ratio())
+    linear = time.perf_counter()
+
+    print("{} categories, {} queries".format(len(names), len(queries)))
+    print("index build:           {:8.1f} ms".format((built - start) * 1000))
+    print("trigram index query:   {:8.3f} ms".format((indexed - built) * 1000 / len(queries)))
+    print("difflib linear query:  {:8.3f} ms".format((linear - indexed) * 1000 / len(queries)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,272 @@
+# Replays chat traffic against curry_bot's command handlers and message triggers, with a fake discord context and a
+# local stand-in for bingosync, random.org and speedrun.com, then reports latency percentiles and throughput per
+# command along with how far the event loop fell behind (a blocking call anywhere shows up there).
+# Run from the repository root with: python -m benchmarks.load_test [--requests N] [--concurrency C] [--traffic FILE]
+# A traffic file has one message per line, optionally prefixed with a channel id and a tab.
+import argparse
+import asyncio
+import inspect
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from aiohttp import web
+
+import common.http_client
+import discord_tools.outbound
+from common.http_client import HttpClient
+from discord_tools.fakes import FakeAuthor, FakeChannel, FakeContext, FakeMessage
+from discord_tools.outbound import Outbox
+
+# relative weights of the synthetic traffic
+SYNTHETIC_TRAFFIC = [
+    ('!roll 2d6', 10),
+    ('!roll d20', 5),
+    ('!roll 4d6kh3+2', 3),
+    ('!roll 1000d6', 1),
+    ('!roll stats 4d6kh3', 1),
+    ('!flip', 5),
+    ('!hello', 5),
+    ('!leaderboard any%', 8),
+    ('!leaderboard any% page 2', 3),
+    ('!leaderboard any% top 50', 2),
+    ('!adrando rm3t3', 3),
+    ('!adrando presets', 2),
+    ('!bingo', 2),
+    ('!bingo 3', 1),
+    ('!countdown 3', 1),
+    ('!about', 1),
+    ('good bot', 5),
+    ('curry', 3),
+    ('just chatting about azure dreams', 20),
+]
+LAG_INTERVAL = 0.005
+STUB_RUNS = 200
+
+
+class StubbedHttpClient(HttpClient):  # sends every request to the stand-in server, under a path naming the real host
+    def __init__(self, stub_url):
+        super().__init__()
+        self._stub_url = stub_url
+
+    async def _send(self, method, url, timeout, **kwargs):
+        parts = urlsplit(url)
+        stub_url = '{}/{}{}'.format(self._stub_url, parts.hostname, parts.path or '/')
+        if parts.query:
+            stub_url += '?' + parts.query
+        return await super()._send(method, stub_url, timeout, **kwargs)
+
+
+def stub_app(latency):
+    # just enough of each service for the bot's requests, each answer delayed by latency seconds
+    rng = random.Random(0)
+    game = {'id': 'g1', 'names': {'international': 'Azure Dreams'}, 'abbreviation': 'ad', 'levels': {'data': []},
+            'categories': {'data': [{'id': 'c1', 'name': 'Any%', 'type': 'per-game', 'variables': {'data': []}},
+                                    {'id': 'c2', 'name': 'Second Tower', 'type': 'per-game', 'variables': {'data': []}}]}}
+    runs = [{'place': place, 'run': {'players': [{'rel': 'user', 'id': 'p{}'.format(place)}],
+                                     'times': {'primary_t': 3000 + place * 7.5}}} for place in range(1, STUB_RUNS + 1)]
+    players = [{'rel': 'user', 'id': 'p{}'.format(place), 'names': {'international': 'Runner {}'.format(place)}}
+               for place in range(1, STUB_RUNS + 1)]
+
+    @web.middleware
+    async def delay(request, handler):
+        await asyncio.sleep(latency)
+        return await handler(request)
+
+    async def random_org(request):
+        return web.Response(text='\n'.join(str(rng.randrange(256)) for _ in range(int(request.query['num']))))
+
+    async def bingosync_form(request):
+        response = web.Response(text='<form></form>')
+        response.set_cookie('csrftoken', 'stub-token')
+        return response
+
+    async def bingosync_create(request):
+        await request.post()
+        raise web.HTTPFound('/bingosync.com/room/' + ''.join(rng.choice(string.ascii_letters) for _ in range(22)))
+
+    async def bingosync_room(request):
+        return web.Response(text='<a href="/room/{}/disconnect">leave</a>'.format(request.match_info['room']))
+
+    async def games(request):
+        return web.json_response({'data': [game]})
+
+    async def game_by_abbreviation(request):
+        if request.match_info['abbreviation'] != 'ad':
+            raise web.HTTPNotFound()
+        return web.json_response({'data': game})
+
+    async def leaderboard(request):
+        top = int(request.query.get('top', STUB_RUNS))
+        return web.json_response({'data': {'runs': runs[:top], 'players': {'data': players[:top]}}})
+
+    app = web.Application(middlewares=[delay])
+    app.router.add_get('/www.random.org/integers/', random_org)
+    app.router.add_get('/bingosync.com/', bingosync_form)
+    app.router.add_post('/bingosync.com/', bingosync_create)
+    app.router.add_get('/bingosync.com/room/{room}', bingosync_room)
+    app.router.add_get('/www.speedrun.com/api/v1/games', games)
+    app.router.add_get('/www.speedrun.com/api/v1/games/{abbreviation}', game_by_abbreviation)
+    app.router.add_get('/www.speedrun.com/api/v1/leaderboards/{game}/category/{category}', leaderboard)
+    return app
+
+
+def synthetic_traffic(count, channels, rng):
+    messages, weights = zip(*SYNTHETIC_TRAFFIC)
+    return [(rng.randrange(channels), content) for content in rng.choices(messages, weights, k=count)]
+
+
+def recorded_traffic(path, channels, rng):
+    traffic = []
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line:
+                continue
+            channel, tab, content = line.partition('\t')
+            traffic.append((int(channel), content) if tab else (rng.randrange(channels), line))
+    return traffic
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class LoadTest:
+    def __init__(self, curry_bot, concurrency):
+        self._curry_bot = curry_bot
+        self._concurrency = concurrency
+        self._channels = {}
+        self.latencies = defaultdict(list)  # command -> seconds
+        self.errors = defaultdict(int)
+        self.lags = []
+
+    async def run(self, traffic):
+        queue = asyncio.Queue()
+        for user_id, (channel_id, content) in enumerate(traffic):
+            queue.put_nowait((user_id, channel_id, content))
+        lag_monitor = asyncio.ensure_future(self._monitor_lag())
+        start = time.perf_counter()
+        await asyncio.gather(*(self._worker(queue) for _ in range(self._concurrency)))
+        elapsed = time.perf_counter() - start
+        lag_monitor.cancel()
+        return elapsed
+
+    async def _worker(self, queue):
+        while not queue.empty():
+            user_id, channel_id, content = queue.get_nowait()
+            await self.handle(user_id, channel_id, content)
+
+    async def handle(self, user_id, channel_id, content):
+        channel = self._channels.get(channel_id)
+        if channel is None:
+            channel = self._channels[channel_id] = FakeChannel(channel_id)
+        message = FakeMessage(content, FakeAuthor(user_id), channel)
+        name, call = self._route(message)
+        start = time.perf_counter()
+        try:
+            await call()
+        except Exception as e:
+            self.errors[name] += 1
+            print("{} failed: {!r}".format(content, e))
+        self.latencies[name].append(time.perf_counter() - start)
+
+    def _route(self, message):
+        # commands are called straight through their callbacks, so checks and cooldowns don't throttle the test
+        bot = self._curry_bot.client
+        if message.content.startswith(bot.command_prefix):
+            words = message.content[len(bot.command_prefix):].split()
+            command = bot.get_command(words[0]) if words else None
+            if command is not None:
+                args = words[1:] if _takes_args(command.callback) else []
+                # commands in a cog are methods, so the cog comes first
+                cog = (command.cog,) if command.cog is not None else ()
+                return command.name, lambda: command.callback(*cog, FakeContext(message), *args)
+        return 'on_message', lambda: self._curry_bot.triggers.dispatch(message)
+
+    async def _monitor_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(max(0.0, time.perf_counter() - start - LAG_INTERVAL))
+
+    def sent(self):
+        return sum(len(channel.messages) for channel in self._channels.values())
+
+
+def _takes_args(callback):
+    return any(parameter.kind == parameter.VAR_POSITIONAL for parameter in inspect.signature(callback).parameters.values())
+
+
+def report(load_test, elapsed):
+    print("{:<14}{:>7}{:>8}{:>9}{:>9}{:>9}{:>9}".format('command', 'calls', 'errors', 'p50 ms', 'p95 ms', 'p99 ms', 'per s'))
+    worst_p99 = 0.0
+    for name, latencies in sorted(load_test.latencies.items(), key=lambda item: -len(item[1])):
+        latencies.sort()
+        p99 = percentile(latencies, 0.99)
+        worst_p99 = max(worst_p99, p99)
+        print("{:<14}{:>7}{:>8}{:>9.1f}{:>9.1f}{:>9.1f}{:>9.1f}".format(
+            name, len(latencies), load_test.errors[name], percentile(latencies, 0.5) * 1000,
+            percentile(latencies, 0.95) * 1000, p99 * 1000, len(latencies) / elapsed))
+    total = sum(len(latencies) for latencies in load_test.latencies.values())
+    print("{} messages in {:.2f} s, {:.0f} per second, {} replies sent".format(total, elapsed, total / elapsed, load_test.sent()))
+    lags = sorted(load_test.lags) or [0.0]
+    print("event loop lag p50 {:.1f} ms, p99 {:.1f} ms, max {:.1f} ms".format(
+        percentile(lags, 0.5) * 1000, percentile(lags, 0.99) * 1000, lags[-1] * 1000))
+    return worst_p99, lags[-1]
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    runner = web.AppRunner(stub_app(args.latency / 1000))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    common.http_client._client = StubbedHttpClient('http://127.0.0.1:{}'.format(port))
+
+    with tempfile.TemporaryDirectory() as directory:
+        import curry_bot
+        from ad_rando.seed_generator import AdrandoCommandHandler
+        AdrandoCommandHandler.SEED_STORE_PATH = os.path.join(directory, 'seeds.db')
+        curry_bot.create_bot()
+        # replies are still queued and merged, just not held back by discord's rate limits
+        discord_tools.outbound.outbox = Outbox(channel_rate=10 ** 6, global_rate=10 ** 6)
+
+        if args.traffic:
+            traffic = recorded_traffic(args.traffic, args.channels, rng)
+        else:
+            traffic = synthetic_traffic(args.requests, args.channels, rng)
+        load_test = LoadTest(curry_bot, args.concurrency)
+        elapsed = await load_test.run(traffic)
+        worst_p99, worst_lag = report(load_test, elapsed)
+        AdrandoCommandHandler.default_seed_store().close()
+
+    await common.http_client.get_client().close()
+    await runner.cleanup()
+    failed = False
+    if args.max_p99 is not None and worst_p99 * 1000 > args.max_p99:
+        print("FAIL: a command's p99 is {:.1f} ms, over the {:.1f} ms limit".format(worst_p99 * 1000, args.max_p99))
+        failed = True
+    if args.max_lag is not None and worst_lag * 1000 > args.max_lag:
+        print("FAIL: the event loop was blocked for {:.1f} ms, over the {:.1f} ms limit".format(worst_lag * 1000, args.max_lag))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test curry_bot's commands against local stand-in services")
+    parser.add_argument('--requests', type=int, default=2000, help="number of synthetic messages")
+    parser.add_argument('--concurrency', type=int, default=32, help="messages handled at once")
+    parser.add_argument('--channels', type=int, default=50, help="channels the traffic is spread over")
+    parser.add_argument('--traffic', help="replay this file instead of synthetic traffic")
+    parser.add_argument('--latency', type=float, default=20, help="milliseconds each stand-in service takes to answer")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-p99', type=float, help="exit with status 1 if any command's p99 exceeds this many ms")
+    parser.add_argument('--max-lag', type=float, help="exit with status 1 if the event loop is blocked this many ms")
+    sys.exit(asyncio.run(main(parser.parse_args())))
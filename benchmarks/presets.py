@@ -0,0 +1,57 @@
+# Compares preset lookup and link building through the PresetCatalogue against the old approach, which rebuilt every
+# preset and filtered them with startswith on each call and formatted the params for every link.
+# Run from the repository root with: python -m benchmarks.presets [number of lookups]
+import sys
+import time
+
+from ad_rando.seed_generator import AdRandomizerParamsDescriptorSelector, FromPresetRandomizerParams, \
+    NoRestrictionsSeedValidator, PresetCatalogue, SeedsGenerator
+
+QUERIES = ['secondtower', 'secondtowerr', 'ro', 'rid', 'sde', 'rm3', 'random']
+SEEDS = list(range(1700000000000, 1700000000007))
+
+
+def old_all_presets():
+    presets = dict((preset_name, (description, FromPresetRandomizerParams(preset_name), NoRestrictionsSeedValidator()))
+                   for preset_name, description in AdRandomizerParamsDescriptorSelector.ADRANDO_PRESETS.items())
+    presets.update((preset_name, descriptor[:3])
+                   for preset_name, descriptor in AdRandomizerParamsDescriptorSelector.MANUAL_PRESETS.items())
+    return presets
+
+
+def old_resolve(searched_preset_name):
+    matching_presets = [preset for preset in old_all_presets().items() if preset[0].startswith(searched_preset_name.lower())]
+    if len(matching_presets) > 1:
+        matching_presets = [preset for preset in matching_presets if preset[0] == searched_preset_name.lower()]
+    return matching_presets[0] if len(matching_presets) == 1 else None
+
+
+def old_links(params):
+    return [f"{SeedsGenerator.ADRANDO_BASE}?{params.params()},,{seed}" for seed in SEEDS]
+
+
+def main(count):
+    catalogue = PresetCatalogue.default()
+    for query in QUERIES:
+        old = old_resolve(query)
+        preset = catalogue.resolve(query)
+        assert old is not None and old[0] == preset.name, query
+        assert old_links(old[1][1]) == [preset.params.link(seed) for seed in SEEDS], query
+
+    start = time.perf_counter()
+    for i in range(count):
+        old_links(old_resolve(QUERIES[i % len(QUERIES)])[1][1])
+    old_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(count):
+        params = catalogue.resolve(QUERIES[i % len(QUERIES)]).params
+        [params.link(seed) for seed in SEEDS]
+    new_seconds = time.perf_counter() - start
+
+    print("{} lookups of {} presets, {} links each".format(count, len(catalogue.presets()), len(SEEDS)))
+    print("old select + format: {:8.1f} us per lookup".format(old_seconds / count * 10 ** 6))
+    print("catalogue + prefix:  {:8.1f} us per lookup ({:.1f}x)".format(new_seconds / count * 10 ** 6, old_seconds / new_seconds))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
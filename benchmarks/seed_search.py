@@ -0,0 +1,47 @@
+# Reports seeds/sec of SeedSearch, in-process and across a process pool, for validators of increasing strictness.
+# Run from the repository root with: python -m benchmarks.seed_search [seeds to find]
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ad_rando.seed_generator import NoHiKewneSeedValidator, SeedGenerator, SeedSearch, SeedValidator
+
+REJECTION_RATES = [0.0, 0.5, 0.9, 0.99]
+
+
+class RejectionRateSeedValidator(SeedValidator):
+    # stands in for stricter validators: hashes like NoHiKewneSeedValidator and rejects the given fraction of seeds
+    def __init__(self, rejection_rate):
+        self._threshold = int(rejection_rate * 2 ** 32)
+
+    def validate(self, seed):
+        return int.from_bytes(hashlib.sha256(str(seed).encode()).digest()[:4], 'big') >= self._threshold
+
+
+def seeds_per_second(validator, count, executor=None):
+    start = time.perf_counter()
+    SeedSearch(validator, executor=executor).find(SeedGenerator(validator), count)
+    return count / (time.perf_counter() - start)
+
+
+def main(count):
+    workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        executor.submit(int).result()  # start the workers before timing
+        print("{:>22} {:>14} {:>14} {:>14}".format('validator', 'next() loop', 'in-process', '{} workers'.format(workers)))
+        validators = [('NoHiKewne', NoHiKewneSeedValidator())] + [
+            ('reject {:.0%}'.format(rate), RejectionRateSeedValidator(rate)) for rate in REJECTION_RATES]
+        for name, validator in validators:
+            start = time.perf_counter()
+            seed_generator = SeedGenerator(validator)
+            for _ in range(count):
+                seed_generator.next()
+            sequential = count / (time.perf_counter() - start)
+            print("{:>22} {:>14.0f} {:>14.0f} {:>14.0f}".format(
+                name, sequential, seeds_per_second(validator, count), seeds_per_second(validator, count, executor)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
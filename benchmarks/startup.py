@@ -0,0 +1,52 @@
+# Measures curry_bot start-up with the network stubbed out: module import, create_bot and on_ready, and the first
+# !leaderboard lookup served from the speedrun.com data in the state database.
+# Run from the repository root with: python -m benchmarks.startup [state database]
+# Without a state database a fresh one is made in a temporary directory, so the bot's own curry_state.db is untouched.
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+from common.http_client import HttpClient, HttpError
+from common.state import SqliteBackend, set_backend
+
+
+async def offline_request(self, method, url, **kwargs):
+    raise HttpError(url, reason='network stubbed out')
+
+
+async def main(state_path):
+    HttpClient.request = offline_request
+
+    start = time.perf_counter()
+    import curry_bot
+    imported = time.perf_counter()
+
+    set_backend(SqliteBackend(state_path))
+    bot = curry_bot.create_bot()
+    bot._connection.user = SimpleNamespace(name='CurryBot')
+    await curry_bot.on_ready()
+    ready = time.perf_counter()
+
+    try:
+        # the first !leaderboard brings in the speedrun plugin before looking anything up
+        category = await bot.get_cog('Speedrun').api().fetch_leaderboard('any%').__anext__()
+    except HttpError:
+        category = None
+    first_leaderboard = time.perf_counter()
+
+    print("import curry_bot:      {:8.1f} ms".format((imported - start) * 1000))
+    print("create_bot + on_ready: {:8.1f} ms".format((ready - imported) * 1000))
+    print("first leaderboard:     {:8.1f} ms ({})".format(
+        (first_leaderboard - ready) * 1000, category if category else 'nothing cached yet'))
+    print("total to first reply:  {:8.1f} ms".format((first_leaderboard - start) * 1000))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        asyncio.run(main(sys.argv[1]))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(main(os.path.join(directory, 'curry_state.db')))
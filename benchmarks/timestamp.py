@@ -0,0 +1,98 @@
+# Compares the speed of the integer millisecond Timestamp against the old four field one; tests/test_timestamp.py
+# checks that they agree.
+# Run from the repository root with: python -m benchmarks.timestamp [number of runs]
+import random
+import sys
+import time
+
+from common.common import Timestamp
+
+
+class OldTimestamp:  # common.common.Timestamp as it was before the rewrite
+    def __init__(self, s):
+        self.hours, self.minutes, self.seconds, self.milliseconds = 0, 0, 0, 0
+        for arg in s.split():
+            if arg.endswith("ms"):
+                self.milliseconds += int(arg[:-2])
+            elif arg.endswith("s"):
+                self.seconds += int(arg[:-1])
+            elif arg.endswith("m"):
+                self.minutes += int(arg[:-1])
+            elif arg.endswith("h"):
+                self.hours += int(arg[:-1])
+
+    @staticmethod
+    def from_milliseconds(ms):
+        t = OldTimestamp("0ms")
+        temp = ms
+        t.hours = temp // 3600000
+        temp %= 3600000
+        t.minutes = temp // 60000
+        temp %= 60000
+        t.seconds = temp // 1000
+        t.milliseconds = temp % 1000
+        return t
+
+    def __str__(self):
+        result = []
+        if self.hours != 0:
+            result.append("{}h".format(self.hours))
+        if not (self.hours == 0 and self.minutes == 0):
+            result.append("{}m".format(self.minutes))
+        result.append("{}s".format(self.seconds))
+        if self.milliseconds > 0:
+            result.append("{}ms".format(self.milliseconds))
+        return ' '.join(result)
+
+    def __lt__(self, other):
+        if self.hours < other.hours:
+            return True
+        elif self.hours > other.hours:
+            return False
+        if self.minutes < other.minutes:
+            return True
+        elif self.minutes > other.minutes:
+            return False
+        if self.seconds < other.seconds:
+            return True
+        elif self.seconds > other.seconds:
+            return False
+        return self.milliseconds < other.milliseconds
+
+
+def random_milliseconds(rng):
+    # mostly sub-hour runs with a tail of long ones, some on whole seconds
+    ms = rng.choice([rng.randrange(60000), rng.randrange(3600000), rng.randrange(30 * 3600000)])
+    return ms - ms % 1000 if rng.random() < 0.2 else ms
+
+
+def best_of(repeat, f):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main(count):
+    rng = random.Random(0)
+    milliseconds = [random_milliseconds(rng) for _ in range(count)]
+    texts = [str(OldTimestamp.from_milliseconds(ms)) for ms in milliseconds]
+
+    old_format = best_of(5, lambda: [str(OldTimestamp.from_milliseconds(ms)) for ms in milliseconds])
+    new_format = best_of(5, lambda: [str(Timestamp.from_milliseconds(ms)) for ms in milliseconds])
+    bulk_format = best_of(5, lambda: Timestamp.format_many(milliseconds))
+    old_parse = best_of(5, lambda: [OldTimestamp(text) for text in texts])
+    new_parse = best_of(5, lambda: [Timestamp(text) for text in texts])
+    old_sort = best_of(5, lambda: sorted(OldTimestamp.from_milliseconds(ms) for ms in milliseconds))
+    new_sort = best_of(5, lambda: sorted(Timestamp.from_milliseconds(ms) for ms in milliseconds))
+
+    print("{} runs".format(count))
+    for name, old, new in (('format', old_format, new_format), ('format_many', old_format, bulk_format),
+                           ('parse', old_parse, new_parse), ('sort', old_sort, new_sort)):
+        print("{:<12} old {:8.2f} ms   new {:8.2f} ms   {:5.1f}x".format(name, old * 1000, new * 1000, old / new))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
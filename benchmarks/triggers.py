@@ -0,0 +1,70 @@
+# Replays a synthetic message corpus through the old on_message if/elif chain and the compiled TriggerDispatcher.
+# Run from the repository root with: python -m benchmarks.triggers [number of messages]
+import random
+import re
+import sys
+import time
+
+from discord_tools.triggers import TriggerDispatcher
+
+BOT_ID = '631144975366619146'
+WORDS = ['the', 'seed', 'kewne', 'run', 'tower', 'floor', 'curry', 'gg', 'wr', 'pb', 'reset', 'any%', 'bot', 'good',
+         'familiar', 'egg', 'koh', 'lol', 'nice', 'race', 'ready', 'go', 'hype', 'donforgo']
+SPECIAL = ['curry', 'curry!!', 'good bot', 'bad bot!', 'is eq% a category?', 'earthquake% when', '<@' + BOT_ID + '> hi']
+
+
+def corpus(count, rng):
+    messages = []
+    for _ in range(count):
+        if rng.random() < 0.05:
+            messages.append(rng.choice(SPECIAL))
+        else:
+            messages.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 20))))
+    return messages
+
+
+def old_path(content):
+    curry_pattern = r"^curry\W*$"
+    if re.match(curry_pattern, content.lower()):
+        return 'curry'
+    elif content.lower() in ("good bot", "good bot.", "good bot!"):
+        return 'good bot'
+    elif content.lower() in ("bad bot", "bad bot.", "bad bot!"):
+        return 'bad bot'
+    elif ("earthquake%" in content.lower() or "eq%" in content.lower()) and random.random() < 0.5:
+        return 'earthquake'
+    elif BOT_ID in content:
+        return 'mention'
+
+
+def new_dispatcher():
+    triggers = TriggerDispatcher()
+    for name, register in [('curry', triggers.regex(r"^curry\W*$")),
+                           ('good bot', triggers.exact("good bot", "good bot.", "good bot!")),
+                           ('bad bot', triggers.exact("bad bot", "bad bot.", "bad bot!")),
+                           ('earthquake', triggers.substring("earthquake%", "eq%", probability=0.5)),
+                           ('mention', triggers.mention(BOT_ID))]:
+        async def action(message):
+            pass
+        action.__name__ = name
+        register(action)
+    return triggers
+
+
+def main(count):
+    messages = corpus(count, random.Random(0))
+    triggers = new_dispatcher()
+
+    start = time.perf_counter()
+    old_hits = sum(1 for message in messages if old_path(message))
+    old = time.perf_counter()
+    new_hits = sum(1 for message in messages if triggers.match(message))
+    new = time.perf_counter()
+
+    print("{} messages ({} / {} triggered)".format(len(messages), old_hits, new_hits))
+    print("old if/elif chain:     {:8.2f} us/message".format((old - start) * 1e6 / len(messages)))
+    print("TriggerDispatcher:     {:8.2f} us/message".format((new - old) * 1e6 / len(messages)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
@@ -1,16 +1,34 @@
+from bingo.bingo_content import get_card_set, get_passphrases
 from bingo.bingosync import *
+from common.http_client import HttpError
 import random
 
+DEFAULT_ROOM_NAME = "Azure Dreams"
+MAX_ROOMS = 8
 
-def get_room(name=None):
-    with open('bingo/bingo_cards.json', 'r') as f:
-        data = f.read()
+
+async def get_room(name=None, card_set=None):
+    data = get_card_set(card_set).payload
 
     # decide password
-    with open('bingo/passphrases.txt', 'r') as f:
-        passphrase = random.choice(f.readlines()).strip()
+    passphrase = random.choice(get_passphrases())
 
     # create room at bingosync
-    room_url = create_room(name if name else "Azure Dreams", passphrase, data)
+    try:
+        room_url = await create_room(name if name else DEFAULT_ROOM_NAME, passphrase, data)
+    except HttpError as e:
+        print(e)
+        room_url = None
     print(room_url, passphrase)
     return room_url, passphrase
+
+
+async def get_rooms(count, name=None, card_set=None):
+    # several rooms for one multi-race event, each with its own passphrase, created concurrently
+    data = get_card_set(card_set).payload
+    passphrases = get_passphrases()
+    name = name if name else DEFAULT_ROOM_NAME
+    rooms = [("{} {}".format(name, i + 1), random.choice(passphrases), data) for i in range(count)]
+    room_urls = await create_rooms(rooms)
+    print(room_urls)
+    return [(room_url, passphrase) for room_url, (_, passphrase, _) in zip(room_urls, rooms)]
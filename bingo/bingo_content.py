@@ -0,0 +1,99 @@
+import json
+import os
+import re
+import time
+
+CARDS_PATH = 'bingo/bingo_cards.json'
+NAMED_CARDS_PATH = 'bingo/bingo_cards_{}.json'
+PASSPHRASES_PATH = 'bingo/passphrases.txt'
+# bingosync needs at least 25 goals to fill a 5x5 card
+MIN_GOALS = 25
+# how often (seconds) to check a file's mtime before reusing its parsed contents
+RELOAD_CHECK_INTERVAL = 5
+CARD_SET_NAME = re.compile(r'^[a-z0-9_-]+$')
+
+
+class BingoContentError(Exception):
+    pass
+
+
+class ContentFile:  # a file parsed once and reparsed only when its mtime changes
+    def __init__(self, path, parse):
+        self._path = path
+        self._parse = parse
+        self._mtime = None
+        self._checked_at = 0
+        self._content = None
+        self._error = None  # the last problem printed, so a broken file is reported once rather than every check
+
+    def get(self):
+        now = time.monotonic()
+        if self._content is None or now - self._checked_at >= RELOAD_CHECK_INTERVAL:
+            self._checked_at = now
+            try:
+                self._reload()
+            except (OSError, BingoContentError) as e:
+                if self._content is None:
+                    raise e if isinstance(e, BingoContentError) else BingoContentError("{} can't be read: {}".format(self._path, e))
+                # a bad edit or a deleted file leaves the last good content in use
+                if str(e) != self._error:
+                    print("Still using the last good {}: {}".format(self._path, e))
+                self._error = str(e)
+        return self._content
+
+    def _reload(self):
+        mtime = os.stat(self._path).st_mtime
+        if mtime != self._mtime or self._content is None:
+            # the mtime is noted first, so a file that fails to parse isn't read again until it changes
+            self._mtime = mtime
+            with open(self._path, 'r') as f:
+                content = self._parse(f.read(), self._path)
+            self._content = content
+            self._error = None
+
+
+class CardSet:
+    def __init__(self, goals):
+        self.goals = goals
+        # the compact form sent to bingosync, serialised once per load
+        self.payload = json.dumps(goals, separators=(',', ':'))
+
+
+def parse_card_set(text, path):
+    try:
+        goals = json.loads(text)
+    except ValueError as e:
+        raise BingoContentError("{} is not valid JSON: {}".format(path, e))
+    if not isinstance(goals, list) or not all(isinstance(goal, dict) and isinstance(goal.get('name'), str)
+                                              and goal['name'].strip() for goal in goals):
+        raise BingoContentError("{} must be a list of goals, each with a name".format(path))
+    if len(goals) < MIN_GOALS:
+        raise BingoContentError("{} has {} goals, bingosync needs at least {}".format(path, len(goals), MIN_GOALS))
+    return CardSet(goals)
+
+
+def parse_passphrases(text, path):
+    passphrases = [line.strip() for line in text.splitlines() if line.strip()]
+    if not passphrases:
+        raise BingoContentError("{} has no passphrases".format(path))
+    return passphrases
+
+
+_card_sets = {}
+_passphrases = ContentFile(PASSPHRASES_PATH, parse_passphrases)
+
+
+def get_card_set(name=None):
+    name = name.lower() if name else ''
+    if name not in _card_sets:
+        if name and not CARD_SET_NAME.match(name):
+            raise BingoContentError("There's no {} card set.".format(name))
+        path = NAMED_CARDS_PATH.format(name) if name else CARDS_PATH
+        if not os.path.exists(path):
+            raise BingoContentError("There's no {} card set.".format(name))
+        _card_sets[name] = ContentFile(path, parse_card_set)
+    return _card_sets[name].get()
+
+
+def get_passphrases():
+    return _passphrases.get()
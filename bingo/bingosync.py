@@ -1,6 +1,7 @@
+import asyncio
 import re
-import requests
-from bs4 import BeautifulSoup
+
+from common.http_client import HttpError, get_client
 
 # api-endpoint
 URL = "https://bingosync.com/"
@@ -12,34 +13,84 @@ DATA = {'nickname':'CurryBot',
         'seed':1,
         'is_spectator':'on'}
 
+# the room page links to /room/<id>/disconnect, so that is all we look for rather than parsing the whole page
+ROOM_PATH_PATTERN = re.compile(r'/room/([^/"\'\s]+)(?:/disconnect)?/?$')
+ROOM_LINK_PATTERN = re.compile(r'href=["\']/room/([^/"\']+)/disconnect["\']')
+CSRF_REJECTED = 403
+
+
+class BingosyncClient:
+    def __init__(self, url=URL, http=None):
+        self._url = url
+        self._http = http or get_client()
+        self._csrf = None
+        self._csrf_lock = None
+
+    async def create_room(self, name, passphrase, bingo_data):
+        try:
+            res = await self._post_room(name, passphrase, bingo_data)
+        except HttpError as e:
+            if e.status != CSRF_REJECTED:
+                raise
+            # the cached token expired; fetch a fresh one and try once more
+            self._csrf = None
+            res = await self._post_room(name, passphrase, bingo_data)
+        roomcode = self._find_room_code(res)
+        if roomcode:
+            return self._url + "room/" + roomcode
+
+    async def create_rooms(self, rooms):
+        # rooms are (name, passphrase, bingo_data) triples; returns a url (or None) for each, in order
+        try:
+            await self._get_csrf()
+        except HttpError as e:
+            print("Could not reach bingosync: {}".format(e))
+            return [None] * len(rooms)
+        results = await asyncio.gather(*(self.create_room(*room) for room in rooms), return_exceptions=True)
+        for (name, _, _), result in zip(rooms, results):
+            if isinstance(result, Exception):
+                print("Could not create bingo room {}: {!r}".format(name, result))
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    async def _post_room(self, name, passphrase, bingo_data):
+        csrf = await self._get_csrf()
+        cookies = {'csrftoken': csrf}
+        data = DATA.copy()
+        data['room_name'] = name
+        data['csrfmiddlewaretoken'] = csrf
+        data['custom_json'] = bingo_data
+        data['passphrase'] = passphrase
+        data['game_type'] = 18
+        data['variant_type'] = 172
+        data['seed'] = ''
+        data['lockout_mode'] = 1
+        data['hide_card'] = 'on'
+
+        # perform POST to create room
+        return await self._http.post(self._url, cookies=cookies, data=data)
+
+    async def _get_csrf(self):
+        if self._csrf_lock is None:
+            self._csrf_lock = asyncio.Lock()
+        async with self._csrf_lock:
+            if self._csrf is None:
+                # perform GET to obtain csrf
+                self._csrf = (await self._http.get(self._url)).cookies.get('csrftoken')
+            return self._csrf
+
+    @staticmethod
+    def _find_room_code(res):
+        # bingosync redirects to the new room, otherwise search for its disconnect link in the response
+        m = ROOM_PATH_PATTERN.search(res.url) or ROOM_LINK_PATTERN.search(res.text)
+        return m.group(1) if m else None
+
+
+bingosync = BingosyncClient()
+
+
+async def create_room(name, passphrase, bingo_data):
+    return await bingosync.create_room(name, passphrase, bingo_data)
+
 
-def create_room(name, passphrase, bingo_data):
-    # perform GET to obtain csrf
-    csrf = requests.get(url=URL).cookies.get('csrftoken')
-
-    cookies = {'csrftoken': csrf}
-    data = DATA.copy()
-    data['room_name'] = name
-    data['csrfmiddlewaretoken'] = csrf
-    data['custom_json'] = bingo_data
-    data['passphrase'] = passphrase
-    data['game_type'] = 18
-    data['variant_type'] = 172
-    data['seed'] = ''
-    data['lockout_mode'] = 1
-    data['hide_card'] = 'on'
-
-    # perform POST to create room
-    res = requests.post(URL, cookies=cookies, data=data)
-
-    # search for room id in response
-    soup = BeautifulSoup(res.text, 'html.parser')
-    pattern = r"/room/(.+)/disconnect"
-    roomcode = None
-    for link in soup.find_all('a'):
-        m = re.match(pattern, link.get('href'))
-        if m:
-            roomcode = m.group(1)
-            break
-    if roomcode:
-        return URL + "room/" + roomcode
+async def create_rooms(rooms):
+    return await bingosync.create_rooms(rooms)
@@ -0,0 +1,50 @@
+import asyncio
+
+from nextcord.ext.commands import Cog, command
+
+from discord_tools.discord_formatting import chunk_lines, curry_message
+from discord_tools.outbound import say
+from discord_tools.plugins import LazyFeature
+
+
+class Adrando(Cog):
+    def __init__(self, bot):
+        self._bot = bot
+        self._feature = LazyFeature('adrando', ('ad_rando.seed_store', 'ad_rando.seed_constraints',
+                                                'ad_rando.seed_generator', 'ad_rando.seed_pool'))
+        self._seed_pools = None  # partitioned per worker process, created on first use
+        self._refill_task = None
+
+    def seed_pools(self):
+        if self._seed_pools is None:
+            seed_generator = self._feature.get('ad_rando.seed_generator')
+            seed_pool = self._feature.get()
+            self._seed_pools = seed_pool.SeedPools(seed_generator.AdRandomizerParamsDescriptorSelector.validators(),
+                                                   partition=self._bot.worker)
+            self._refill_task = asyncio.ensure_future(self._seed_pools.run())
+        return self._seed_pools
+
+    def cog_unload(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+        if self._feature.loaded:
+            self._feature.get('ad_rando.seed_generator').AdrandoCommandHandler.close_default_seed_store()
+
+    def stats_lines(self):
+        if self._seed_pools is None:
+            return []
+        return ["seed pools " + ', '.join("{} {}".format(preset, pool['depth'])
+                                          for preset, pool in self._seed_pools.metrics().items())]
+
+    @command(description="Type '!adrando' to fetch the current seed link runners are playing on.\nType '!adrando <link>' to overwrite current seed with a new one of your choice.\nType '!adrando presets' for a list of presets.\nType '!adrando presets <category or tournament>' to list only those, e.g. '!adrando presets rm3t'.\nType '!adrando <preset>' to generate a seed of the given preset.\nType '!adrando <preset> <quantity>' to generate quantity seeds of the given preset.\nType '!adrando history' to list the seeds recently generated in this channel.\nType '!adrando history <date>' for the seeds generated here that day (UTC), e.g. '!adrando history 2024-01-31'.", brief="Make or get current adrando seeds")
+    async def adrando(self, ctx, *args):
+        seed_pools = self.seed_pools()
+        handler = self._feature.get('ad_rando.seed_generator').AdrandoCommandHandler
+        responses = handler(args, ctx.guild.id if ctx.guild else 0, ctx.channel.id, seed_pools=seed_pools).handle()
+        # a few sets of history or a long preset list go past discord's message limit in one piece
+        for message in chunk_lines(curry_message(response) for response in responses):
+            say(ctx.channel, message)
+
+
+def setup(bot):
+    bot.add_cog(Adrando(bot))
@@ -0,0 +1,39 @@
+from nextcord.ext.commands import Cog, command
+
+from discord_tools.discord_formatting import curry_message, italics
+from discord_tools.outbound import say
+from discord_tools.plugins import LazyFeature
+
+
+class Bingo(Cog):
+    def __init__(self, bot):
+        self._feature = LazyFeature('bingo', ('bingo.bingosync', 'bingo.bingo_content', 'bingo.bingo'))
+
+    # the room limit lives in bingo.bingo, which isn't imported until the first !bingo, so the help text leaves it out
+    @command(description="Creates a Bingo room at https://bingosync.com/ and provides the link and password.\nType '!bingo <card set>' to use a named card set.\nType '!bingo <quantity>' to create several rooms at once.", brief="Create a Bingo game")
+    async def bingo(self, ctx, *args):
+        bingo = self._feature.get()
+        bingo_content = self._feature.get('bingo.bingo_content')
+        count = int(args[-1]) if args and args[-1].isdigit() else 1
+        card_set = args[0] if args and not args[0].isdigit() else None
+        if not 1 <= count <= bingo.MAX_ROOMS:
+            say(ctx.channel, curry_message("I can only create between 1 and {} rooms at once.".format(bingo.MAX_ROOMS)))
+            return
+        say(ctx.channel, curry_message("Creating Bingo room{}. Please wait a moment...".format('s' if count > 1 else '')))
+        try:
+            if count == 1:
+                rooms = [await bingo.get_room(card_set=card_set)]
+            else:
+                rooms = await bingo.get_rooms(count, card_set=card_set)
+        except bingo_content.BingoContentError as e:
+            say(ctx.channel, curry_message("{} Curry.".format(e)))
+            return
+        for room_url, password in rooms:
+            if not room_url:
+                say(ctx.channel, curry_message("Error! I wasn't able to create the room. Curry."))
+            else:
+                say(ctx.channel, curry_message("...done. Room created at URL: {} with password: {}\nGo do your best! Don't stumble!".format(room_url, italics(password))))
+
+
+def setup(bot):
+    bot.add_cog(Bingo(bot))
@@ -0,0 +1,99 @@
+import asyncio
+
+from nextcord.ext.commands import Cog, command
+
+from discord_tools.discord_formatting import curry_message
+from discord_tools.outbound import say
+from discord_tools.plugins import LazyFeature
+
+# !roll stats charts every possible result when there are at most this many
+MAX_ROLL_CHART_ROWS = 30
+# a longer expression is cut short when it's repeated back
+MAX_ECHOED_EXPRESSION = 100
+
+# EMOJIS
+HEADS = '<:heads:1175710881183715401>'
+TAILS = '<:tails:1175711089997135872>'
+
+
+def echoed(expression):
+    text = str(expression)
+    return text if len(text) <= MAX_ECHOED_EXPRESSION else text[:MAX_ECHOED_EXPRESSION] + '...'
+
+
+class Dice(Cog):
+    def __init__(self, bot):
+        self._feature = LazyFeature('dice', ('randomwrapper.entropy_pool', 'randomwrapper.dice', 'randomwrapper.randomwrapper'))
+
+    def randomwrapper(self):
+        randomwrapper = self._feature.get()
+        # the random.org pool starts filling the first time it's needed rather than at login
+        randomwrapper.entropy_pool.top_up()
+        return randomwrapper
+
+    def stats_lines(self):
+        if not self._feature.loaded:
+            return []
+        entropy = self._feature.get().entropy_pool.metrics()
+        return ["random.org pool {size}/{capacity} bytes, hit rate {hit_rate:.0%}, fallback rate {fallback_rate:.0%}".format(**entropy)]
+
+    @command(description="Flip a coin, resulting in Heads or Tails. Uses random bits from random.org", brief="Flip a coin")
+    async def flip(self, ctx):
+        randomwrapper = self.randomwrapper()
+        say(ctx.channel, curry_message("Flipping coin..."))
+        if await randomwrapper.dice_roll(1, 2) == 1:
+            say(ctx.channel, curry_message("Heads " + HEADS))
+        else:
+            say(ctx.channel, curry_message("Tails " + TAILS))
+
+    @command(description="Roll dice. For instance '!roll 2d8' rolls two 8-sided dice and sums them, '!roll d20' rolls a 20-sided die, '!roll 4d6kh3+2' keeps the highest three of four d6 and adds 2, '!roll 8d6dl2' drops the lowest two, and '!roll 10d10!' rolls again and adds on every 10.\nType '!roll stats <dice>' for the exact odds of each result. Uses random bits from random.org", brief="Roll dice")
+    async def roll(self, ctx, *args):
+        randomwrapper = self.randomwrapper()
+        dice = self._feature.get('randomwrapper.dice')
+        if args and args[0].lower() == 'stats':
+            await self.roll_stats(ctx, ' '.join(args[1:]) or 'd20')
+            return
+        if not args:
+            say(ctx.channel, curry_message("No argument supplied. Defaulting to d20..."))
+        try:
+            expression = dice.compile_expression(' '.join(args) or 'd20')
+        except dice.DiceError as e:
+            say(ctx.channel, curry_message("{} See '!help roll'.".format(e)))
+            return
+        single_die = isinstance(expression, dice.DicePool) and expression.count == 1
+        if single_die:
+            say(ctx.channel, curry_message("Rolling a d{}...".format(expression.sides)))
+        else:
+            say(ctx.channel, curry_message("Rolling {}...".format(echoed(expression))))
+        result, detail = expression.roll(randomwrapper.roll_dice)
+        if detail == '[{}]'.format(result):
+            say(ctx.channel, curry_message("Result: {}".format(result)))
+        else:
+            say(ctx.channel, curry_message("Result: {}  {}".format(result, detail)))
+        if single_die and expression.sides == 20 and result == 20:
+            say(ctx.channel, curry_message("Critical hit!"))
+
+    async def roll_stats(self, ctx, text):
+        dice = self._feature.get('randomwrapper.dice')
+        try:
+            expression = dice.compile_expression(text)
+            # a big pool takes up to a second to work out, so keep it off the event loop
+            distribution = await asyncio.get_running_loop().run_in_executor(None, expression.distribution)
+        except dice.DiceError as e:
+            say(ctx.channel, curry_message("{} See '!help roll'.".format(e)))
+            return
+        mode, mode_probability = distribution.mode()
+        lines = ["{}: {} to {}, average {:.2f}, standard deviation {:.2f}".format(
+                     echoed(expression), distribution.offset, distribution.offset + len(distribution.counts) - 1,
+                     distribution.mean(), distribution.stdev()),
+                 "Median {}, 90% of rolls between {} and {}, most likely {} ({:.1%})".format(
+                     distribution.percentile(50), distribution.percentile(5), distribution.percentile(95), mode, mode_probability)]
+        if len(distribution.counts) <= MAX_ROLL_CHART_ROWS:
+            chart = ["{:>4} {:>6.2%} {}".format(total, probability, '#' * round(probability / mode_probability * 20))
+                     for total, probability in distribution.probabilities()]
+            lines.append("```\n{}\n```".format('\n'.join(chart)))
+        say(ctx.channel, curry_message('\n'.join(lines)))
+
+
+def setup(bot):
+    bot.add_cog(Dice(bot))
@@ -0,0 +1,161 @@
+import asyncio
+
+from nextcord.ext.commands import Cog, command
+
+from common.common import Timestamp
+from discord_tools.discord_formatting import bold, chunk_lines, curry_message
+from discord_tools.outbound import say
+from discord_tools.plugins import FeatureUnavailable, LazyFeature
+
+LEADERBOARD_PAGE_SIZE = 20
+MAX_LEADERBOARD_TOP = 100
+# with nothing cached, a speedrun.com outage leaves nothing to show
+UNAVAILABLE_MESSAGE = "speedrun.com isn't answering right now. Try again in a few minutes. Curry."
+
+
+def category_not_found_message(e):
+    if e.candidates:
+        return curry_message("Not sure which category you mean. Did you mean {}?".format(' or '.join(bold(c) for c in e.candidates)))
+    return curry_message("I don't know a category called {}. Curry.".format(e.query))
+
+
+class Speedrun(Cog):
+    def __init__(self, bot):
+        self._bot = bot
+        self._feature = LazyFeature('speedrun', ('speedrunapi.ttl_cache', 'speedrunapi.category_index',
+                                                 'speedrunapi.speedrunapi', 'speedrunapi.leaderboard_watcher'))
+        self._watcher = None
+        self._tasks = []
+        # on_ready doesn't fire again for a cog reloaded while the bot is connected, so it starts straight away
+        if bot.is_ready():
+            self.start()
+
+    def api(self):
+        return self._feature.get('speedrunapi.speedrunapi')
+
+    def watcher(self):
+        if self._watcher is None:
+            self._watcher = self._feature.get().LeaderboardWatcher()
+        return self._watcher
+
+    @Cog.listener()
+    async def on_ready(self):
+        self.start()
+
+    def start(self):
+        # watched leaderboards are polled whether or not anyone types a command, so the feature comes in after login;
+        # on_ready fires again after a reconnect, which mustn't start a second watcher
+        if not self._tasks:
+            self._tasks.append(asyncio.ensure_future(self._start()))
+
+    async def _start(self):
+        try:
+            api = self.api()
+        except FeatureUnavailable:
+            return
+        self._tasks.append(asyncio.ensure_future(api.warm_up()))
+        # only the first worker process polls for leaderboard changes
+        if self._bot.worker[0] == 0:
+            self._tasks.append(asyncio.ensure_future(self.watcher().run(self.post_leaderboard_change)))
+
+    def post_leaderboard_change(self, channel_id, text):
+        # the channel may be on another process' shard, which a partial messageable can still send to
+        say(self._bot.get_channel(channel_id) or self._bot.get_partial_messageable(channel_id), curry_message(text))
+
+    def cog_unload(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def stats_lines(self):
+        if self._watcher is None:
+            return []
+        return ["leaderboard watch {polls} polls, {not_modified} not modified, {unchanged} unchanged".format(**self._watcher.metrics())]
+
+    @command(description="Type '!leaderboard <category>' to display the top {} of the current leaderboard.\nType '!leaderboard <game abbreviation> <category>' for a game other than Azure Dreams, e.g. '!leaderboard ad2 any%'.\nType '!leaderboard <category> page <n>' for the runs after that, {} per page.\nType '!leaderboard <category> top <n>' for the top n runs, up to {}.\nType '!leaderboard watch <category>' to have new records and rank changes posted in this channel.\nType '!leaderboard unwatch <category>' to stop them.\nType '!leaderboard watching' to list the watched categories.".format(LEADERBOARD_PAGE_SIZE, LEADERBOARD_PAGE_SIZE, MAX_LEADERBOARD_TOP), brief="Fetch requested speedrun leaderboard")
+    async def leaderboard(self, ctx, *args):
+        api = self.api()
+        if not args:
+            say(ctx.channel, curry_message("No category supplied. Type '!help leaderboard' for more info. Curry."))
+            return
+        if args[0].lower() in ('watch', 'unwatch', 'watching'):
+            await self.watch_leaderboard(ctx, args[0].lower(), ' '.join(args[1:]))
+            return
+        start, stop, page = 0, LEADERBOARD_PAGE_SIZE, 1
+        if len(args) > 2 and args[-2].lower() in ('top', 'page') and args[-1].isdigit():
+            n = int(args[-1])
+            if args[-2].lower() == 'top':
+                if not 1 <= n <= MAX_LEADERBOARD_TOP:
+                    say(ctx.channel, curry_message("I can show between the top 1 and top {} runs.".format(MAX_LEADERBOARD_TOP)))
+                    return
+                stop, page = n, None
+            else:
+                if n < 1:
+                    say(ctx.channel, curry_message("Pages start at 1. Curry."))
+                    return
+                page = n
+                start, stop = (n - 1) * LEADERBOARD_PAGE_SIZE, n * LEADERBOARD_PAGE_SIZE
+            args = args[:-2]
+        # one run past the end shows whether there is another page
+        rows = api.fetch_leaderboard(' '.join(args), start, stop + 1)
+        try:
+            name = await rows.__anext__()
+        except api.CategoryNotFoundError as e:
+            say(ctx.channel, category_not_found_message(e))
+            return
+        except api.HttpError:
+            say(ctx.channel, curry_message(UNAVAILABLE_MESSAGE))
+            return
+        say(ctx.channel, curry_message("Fetching {} leaderboard...".format(name)))
+        try:
+            runs = [run async for run in rows]
+        except api.HttpError:
+            say(ctx.channel, curry_message(UNAVAILABLE_MESSAGE))
+            return
+        if not runs:
+            say(ctx.channel, curry_message("There are no runs on page {}.".format(page) if page and page > 1 else "There are no runs yet."))
+            return
+        more = len(runs) > stop - start
+        runs = runs[:stop - start]
+        times = Timestamp.format_many(seconds * 1000 for _, _, seconds in runs)
+        lines = [curry_message("Rank: {}\tRunner: {}\t\tTime: {}".format(rank, player, run_time))
+                 for (rank, player, _), run_time in zip(runs, times)]
+        if more and page:
+            lines.append(curry_message("Type '!leaderboard {} page {}' for more.".format(' '.join(args), page + 1)))
+        for message in chunk_lines(lines):
+            say(ctx.channel, message)
+
+    async def watch_leaderboard(self, ctx, action, query):
+        api = self.api()
+        watcher = self.watcher()
+        if action == 'watching':
+            names = watcher.subscriptions(ctx.channel.id)
+            if names:
+                say(ctx.channel, curry_message("Watching: {}".format(', '.join(bold(name) for name in names))))
+            else:
+                say(ctx.channel, curry_message("No leaderboards are being watched in this channel."))
+            return
+        if not query:
+            say(ctx.channel, curry_message("No category supplied. Type '!help leaderboard' for more info. Curry."))
+            return
+        try:
+            game, name, category = await api.find_category(query)
+        except api.CategoryNotFoundError as e:
+            say(ctx.channel, category_not_found_message(e))
+            return
+        except api.HttpError:
+            say(ctx.channel, curry_message(UNAVAILABLE_MESSAGE))
+            return
+        key = api.leaderboard_key(category)
+        if action == 'watch':
+            if watcher.subscribe(ctx.channel.id, key, name, game.id, category):
+                say(ctx.channel, curry_message("I'll post {} leaderboard changes here.".format(bold(name))))
+            else:
+                say(ctx.channel, curry_message("I'm already watching {} here.".format(bold(name))))
+        elif watcher.unsubscribe(ctx.channel.id, key):
+            say(ctx.channel, curry_message("Stopped watching {}.".format(bold(name))))
+        else:
+            say(ctx.channel, curry_message("I wasn't watching {} here.".format(bold(name))))
+
+
+def setup(bot):
+    bot.add_cog(Speedrun(bot))
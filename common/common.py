@@ -1,7 +1,9 @@
-from requests.models import PreparedRequest
+import re
 
 
 def is_valid_url(url):
+    # requests takes longer to import than the rest of the bot's own code, so it only comes in when a url is checked
+    from requests.models import PreparedRequest
     prepared_request = PreparedRequest()
     try:
         prepared_request.prepare_url(url, None)
@@ -10,56 +12,132 @@ def is_valid_url(url):
         return False
 
 
-class Timestamp:  # a speedrun.com style timestamp e.g. "3h 53m 233s 380ms"
+MS_PER_SECOND = 1000
+MS_PER_MINUTE = 60 * MS_PER_SECOND
+MS_PER_HOUR = 60 * MS_PER_MINUTE
+UNIT_MS = (('ms', 1), ('s', MS_PER_SECOND), ('m', MS_PER_MINUTE), ('h', MS_PER_HOUR))
+# the canonical "3h 53m 233s 380ms" layout in one match; anything else goes through the token by token parser
+TIMESTAMP_PATTERN = re.compile(r'\s*(?:(\d+)h\s*)?(?:(\d+)m\s*)?(?:(\d+)s\s*)?(?:(\d+)ms\s*)?')
+
+
+class Timestamp:  # a speedrun.com style timestamp e.g. "3h 53m 233s 380ms", held as a whole number of milliseconds
+    __slots__ = ('ms',)
+
     def __init__(self, s):
-        self.hours, self.minutes, self.seconds, self.milliseconds = 0, 0, 0, 0
+        match = TIMESTAMP_PATTERN.fullmatch(s)
+        if match:
+            hours, minutes, seconds, milliseconds = match.groups('0')
+            self.ms = (int(hours) * MS_PER_HOUR + int(minutes) * MS_PER_MINUTE + int(seconds) * MS_PER_SECOND
+                       + int(milliseconds))
+            return
+        # fields may come in any order or repeat, and unknown tokens are ignored
+        self.ms = 0
         for arg in s.split():
-            if arg.endswith("ms"):
-                self.milliseconds += int(arg[:-2])
-            elif arg.endswith("s"):
-                self.seconds += int(arg[:-1])
-            elif arg.endswith("m"):
-                self.minutes += int(arg[:-1])
-            elif arg.endswith("h"):
-                self.hours += int(arg[:-1])
+            for unit, scale in UNIT_MS:
+                if arg.endswith(unit):
+                    self.ms += int(arg[:-len(unit)]) * scale
+                    break
 
     @staticmethod
     def from_milliseconds(ms):
-        t = Timestamp("0ms")
-        temp = ms
-        t.hours = temp // 3600000
-        temp %= 3600000
-        t.minutes = temp // 60000
-        temp %= 60000
-        t.seconds = temp // 1000
-        t.milliseconds = temp % 1000
+        t = Timestamp.__new__(Timestamp)
+        t.ms = int(round(ms))
         return t
 
+    @staticmethod
+    def format_many(milliseconds):
+        # formats a whole leaderboard's worth of times without building a Timestamp for each
+        format_milliseconds = _format_milliseconds
+        return [format_milliseconds(int(round(ms))) for ms in milliseconds]
+
+    @property
+    def hours(self):
+        return self.ms // MS_PER_HOUR
+
+    @property
+    def minutes(self):
+        return self.ms % MS_PER_HOUR // MS_PER_MINUTE
+
+    @property
+    def seconds(self):
+        return self.ms % MS_PER_MINUTE // MS_PER_SECOND
+
+    @property
+    def milliseconds(self):
+        return self.ms % MS_PER_SECOND
+
     def __str__(self):
-        result = []
-        if self.hours != 0:
-            result.append("{}h".format(self.hours))
-        if not (self.hours == 0 and self.minutes == 0):
-            result.append("{}m".format(self.minutes))
-        result.append("{}s".format(self.seconds))
-        if self.milliseconds > 0:
-            result.append("{}ms".format(self.milliseconds))
-        return ' '.join(result)
+        return _format_milliseconds(self.ms)
+
+    def __repr__(self):
+        return 'Timestamp({!r})'.format(str(self))
+
+    def __hash__(self):
+        return hash(self.ms)
 
     def __eq__(self, other):
-        return self.hours == other.hours and self.minutes == other.minutes and self.seconds == other.seconds and self.milliseconds == other.milliseconds
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return self.ms == other.ms
 
     def __lt__(self, other):
-        if self.hours < other.hours:
-            return True
-        elif self.hours > other.hours:
-            return False
-        if self.minutes < other.minutes:
-            return True
-        elif self.minutes > other.minutes:
-            return False
-        if self.seconds < other.seconds:
-            return True
-        elif self.seconds > other.seconds:
-            return False
-        return self.milliseconds < other.milliseconds
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return self.ms < other.ms
+
+    def __le__(self, other):
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return self.ms <= other.ms
+
+    def __gt__(self, other):
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return self.ms > other.ms
+
+    def __ge__(self, other):
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return self.ms >= other.ms
+
+    def __add__(self, other):
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return Timestamp.from_milliseconds(self.ms + other.ms)
+
+    def __sub__(self, other):
+        if not isinstance(other, Timestamp):
+            return NotImplemented
+        return Timestamp.from_milliseconds(self.ms - other.ms)
+
+    def __mul__(self, factor):
+        if not isinstance(factor, (int, float)):
+            return NotImplemented
+        return Timestamp.from_milliseconds(self.ms * factor)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        # a timestamp over a timestamp is their ratio, over a number it is a shorter timestamp
+        if isinstance(other, Timestamp):
+            return self.ms / other.ms
+        if not isinstance(other, (int, float)):
+            return NotImplemented
+        return Timestamp.from_milliseconds(self.ms / other)
+
+
+def _format_milliseconds(ms):
+    if ms < 0:
+        return '-' + _format_milliseconds(-ms)
+    # most runs are under an hour, so only split out the units that are actually there
+    seconds, ms = divmod(ms, MS_PER_SECOND)
+    if seconds < 60:
+        text = '{}s'.format(seconds)
+    else:
+        minutes, seconds = divmod(seconds, 60)
+        if minutes < 60:
+            text = '{}m {}s'.format(minutes, seconds)
+        else:
+            hours, minutes = divmod(minutes, 60)
+            text = '{}h {}m {}s'.format(hours, minutes, seconds)
+    return '{} {}ms'.format(text, ms) if ms else text
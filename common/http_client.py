@@ -0,0 +1,126 @@
+import asyncio
+import json
+import random
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from common.metrics import metrics
+
+DEFAULT_TIMEOUT = 10
+HOST_TIMEOUTS = {'www.random.org': 5,
+                 'bingosync.com': 15,
+                 'www.speedrun.com': 15}
+DEFAULT_HOST_CONCURRENCY = 4
+HOST_CONCURRENCY = {'www.random.org': 2}
+CONNECTION_LIMIT = 20
+RETRIES = 2
+BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD')
+# metrics are reported per integration rather than per raw host name
+HOST_INTEGRATIONS = {'www.random.org': 'random.org',
+                     'bingosync.com': 'bingosync',
+                     'www.speedrun.com': 'speedrun.com'}
+
+
+class HttpError(Exception):
+    def __init__(self, url, status=None, reason=None):
+        super().__init__("{} {}".format(url, status if status is not None else reason))
+        self.url = url
+        self.status = status
+        self.reason = reason
+
+
+class HttpResponse:
+    def __init__(self, url, status, headers, cookies, text):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.cookies = cookies
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class HttpClient:
+    def __init__(self, retries=RETRIES, backoff=BACKOFF, host_timeouts=None, host_concurrency=None,
+                 connection_limit=CONNECTION_LIMIT):
+        self._retries = retries
+        self._backoff = backoff
+        self._host_timeouts = dict(HOST_TIMEOUTS, **(host_timeouts or {}))
+        self._host_concurrency = dict(HOST_CONCURRENCY, **(host_concurrency or {}))
+        self._connection_limit = connection_limit
+        self._semaphores = {}
+        self._session = None
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def request(self, method, url, retries=None, **kwargs):
+        host = urlsplit(url).hostname
+        integration = HOST_INTEGRATIONS.get(host, host)
+        metrics.count('http_requests_total', integration=integration)
+        try:
+            with metrics.timer('http_request_seconds', integration=integration):
+                return await self._request(method, url, host, integration, retries, **kwargs)
+        except HttpError:
+            metrics.count('http_errors_total', integration=integration)
+            raise
+
+    async def _request(self, method, url, host, integration, retries, **kwargs):
+        if retries is None:
+            retries = self._retries if method in IDEMPOTENT_METHODS else 0
+        timeout = aiohttp.ClientTimeout(total=self._host_timeouts.get(host, DEFAULT_TIMEOUT))
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore(host):
+                    response = await self._send(method, url, timeout, **kwargs)
+                if response.status not in RETRY_STATUSES or attempt >= retries:
+                    if response.status >= 400:
+                        raise HttpError(url, status=response.status)
+                    return response
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= retries:
+                    raise HttpError(url, reason=repr(e)) from e
+            attempt += 1
+            metrics.count('http_retries_total', integration=integration)
+            # exponential backoff with jitter so concurrent retries don't stampede the host
+            await asyncio.sleep(self._backoff * 2 ** (attempt - 1) * (1 + random.random()))
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _send(self, method, url, timeout, **kwargs):
+        async with self._get_session().request(method, url, timeout=timeout, **kwargs) as res:
+            text = await res.text()
+            cookies = {name: morsel.value for name, morsel in res.cookies.items()}
+            return HttpResponse(str(res.url), res.status, dict(res.headers), cookies, text)
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._connection_limit, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _semaphore(self, host):
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self._host_concurrency.get(host, DEFAULT_HOST_CONCURRENCY))
+        return self._semaphores[host]
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = HttpClient()
+    return _client
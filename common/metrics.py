@@ -0,0 +1,137 @@
+import asyncio
+import os
+import time
+from bisect import bisect_left
+
+# upper bounds in seconds, prometheus style; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+LOOP_LAG_INTERVAL = 1
+METRICS_PREFIX = 'currybot_'
+
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def quantile(self, q):
+        # estimated by interpolating inside the bucket the quantile falls in
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = LATENCY_BUCKETS[i - 1] if i else 0.0
+                # nothing bounds the overflow bucket, so assume it spans up to twice the last finite bound
+                upper = LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) - 1 else lower * 2
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return LATENCY_BUCKETS[-2]
+
+
+class Timer:
+    __slots__ = ('_metrics', '_name', '_labels', '_start')
+
+    def __init__(self, metrics, name, labels):
+        self._metrics = metrics
+        self._name = name
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._metrics.observe(self._name, time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class Metrics:
+    def __init__(self):
+        self._counters = {}  # (name, labels) -> count
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._lag_task = None
+
+    def count(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def timer(self, name, **labels):
+        return Timer(self, name, labels)
+
+    def counters(self, name):
+        return {labels: value for (counter_name, labels), value in self._counters.items() if counter_name == name}
+
+    def histograms(self, name):
+        return {labels: histogram for (histogram_name, labels), histogram in self._histograms.items()
+                if histogram_name == name}
+
+    def latency_summary(self, name, label):
+        # (label value, count, p50, p95, p99) rows for one histogram family, busiest first
+        rows = [(dict(labels).get(label, ''), histogram.count, histogram.quantile(0.5), histogram.quantile(0.95),
+                 histogram.quantile(0.99)) for labels, histogram in self.histograms(name).items()]
+        return sorted(rows, key=lambda row: -row[1])
+
+    def start_loop_lag_monitor(self, interval=LOOP_LAG_INTERVAL):
+        if self._lag_task is None or self._lag_task.done():
+            self._lag_task = asyncio.ensure_future(self._monitor_loop_lag(interval))
+
+    async def _monitor_loop_lag(self, interval):
+        # a blocked event loop wakes us up late; the overshoot is the lag every other coroutine saw too
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.observe('event_loop_lag_seconds', max(0.0, time.perf_counter() - start - interval))
+
+    def render_prometheus(self):
+        lines = []
+        for (name, labels), value in sorted(self._counters.items()):
+            lines.append('{}{}{} {}'.format(METRICS_PREFIX, name, _format_labels(labels), value))
+        for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, histogram.counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('{}{}_bucket{} {}'.format(METRICS_PREFIX, name, _format_labels(labels + (('le', le),)), cumulative))
+            lines.append('{}{}_sum{} {}'.format(METRICS_PREFIX, name, _format_labels(labels), histogram.total))
+            lines.append('{}{}_count{} {}'.format(METRICS_PREFIX, name, _format_labels(labels), histogram.count))
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+
+    async def dump_periodically(self, path, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.dump(path)
+            except OSError as e:
+                print("Could not write metrics to {}: {!r}".format(path, e))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(key, str(value).replace('"', '\\"')) for key, value in labels) + '}'
+
+
+metrics = Metrics()
@@ -0,0 +1,126 @@
+import json
+import sqlite3
+
+# how long a call on the event loop waits for another process' write to finish before giving up on the database
+BUSY_TIMEOUT = 0.05
+SETUP_TIMEOUT = 30
+_DELETED = object()
+
+
+class InProcessBackend:  # state private to this process; the default when running a single bot
+    def __init__(self):
+        self._data = {}
+
+    def get(self, namespace, key):
+        return self._data.get((namespace, key))
+
+    def set(self, namespace, key, value):
+        self._data[(namespace, key)] = value
+
+    def set_many(self, namespace, items):
+        for key, value in items:
+            self._data[(namespace, key)] = value
+
+    def delete(self, namespace, key):
+        self._data.pop((namespace, key), None)
+
+    def items(self, namespace):
+        return [(key, value) for (item_namespace, key), value in self._data.items() if item_namespace == namespace]
+
+
+class SqliteBackend:  # state shared by every process (e.g. each shard worker) pointed at the same file
+    def __init__(self, path, busy_timeout=BUSY_TIMEOUT):
+        # setting up happens once at start-up, so it may wait out another process; after that every call is on the
+        # event loop and gives up quickly
+        self._connection = sqlite3.connect(path, timeout=SETUP_TIMEOUT)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('CREATE TABLE IF NOT EXISTS state (namespace TEXT NOT NULL, key TEXT NOT NULL, '
+                                 'value TEXT NOT NULL, PRIMARY KEY (namespace, key)) WITHOUT ROWID')
+        self._connection.commit()
+        self._connection.execute('PRAGMA busy_timeout = {}'.format(int(busy_timeout * 1000)))
+        # the last decoded value per key, handed back as the same object while the stored text is unchanged
+        self._decoded = {}
+        # writes that found the database locked, (namespace, key) -> value or _DELETED, retried on the next call
+        self._unwritten = {}
+
+    def get(self, namespace, key):
+        self._write_unwritten()
+        if (namespace, key) in self._unwritten:
+            value = self._unwritten[(namespace, key)]
+            return None if value is _DELETED else value
+        try:
+            row = self._connection.execute('SELECT value FROM state WHERE namespace = ? AND key = ?',
+                                           (namespace, key)).fetchone()
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            # what this process saw last, or a miss
+            cached = self._decoded.get((namespace, key))
+            return cached[1] if cached else None
+        if row is None:
+            return None
+        text, = row
+        cached = self._decoded.get((namespace, key))
+        if cached is None or cached[0] != text:
+            cached = self._decoded[(namespace, key)] = (text, json.loads(text))
+        return cached[1]
+
+    def set(self, namespace, key, value):
+        self.set_many(namespace, [(key, value)])
+
+    def set_many(self, namespace, items):
+        self._unwritten.update(((namespace, key), value) for key, value in items)
+        self._write_unwritten()
+
+    def delete(self, namespace, key):
+        self._unwritten[(namespace, key)] = _DELETED
+        self._decoded.pop((namespace, key), None)
+        self._write_unwritten()
+
+    def items(self, namespace):
+        self._write_unwritten()
+        try:
+            keys = {key for key, in self._connection.execute('SELECT key FROM state WHERE namespace = ?', (namespace,))}
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            keys = {key for item_namespace, key in self._decoded if item_namespace == namespace}
+        keys |= {key for item_namespace, key in self._unwritten if item_namespace == namespace}
+        items = [(key, self.get(namespace, key)) for key in sorted(keys)]
+        return [(key, value) for key, value in items if value is not None]
+
+    def _write_unwritten(self):
+        if not self._unwritten:
+            return
+        values = [(namespace, key, json.dumps(value, separators=(',', ':')))
+                  for (namespace, key), value in self._unwritten.items() if value is not _DELETED]
+        deleted = [item for item, value in self._unwritten.items() if value is _DELETED]
+        try:
+            with self._connection:
+                self._connection.executemany('INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)',
+                                             values)
+                self._connection.executemany('DELETE FROM state WHERE namespace = ? AND key = ?', deleted)
+        except sqlite3.OperationalError as e:
+            if not _is_locked(e):
+                raise
+            return
+        self._unwritten.clear()
+
+
+def _is_locked(e):
+    return 'locked' in str(e)
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = InProcessBackend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
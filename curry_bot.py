@@ -1,198 +1,363 @@
-import random
-
 from nextcord import Game, Intents, Status
-from nextcord.ext.commands import Bot
+from nextcord.ext.commands import AutoShardedBot, Bot, BucketType, CommandInvokeError, CommandOnCooldown, \
+    CooldownMapping, ExtensionError, command, is_owner
 
-from ad_rando.seed_generator import AdrandoCommandHandler
-from bingo.bingo import get_room
-from common.common import Timestamp
+from common.metrics import metrics
+from common.state import InProcessBackend, SqliteBackend, set_backend
 from discord_tools.auth import get_token
 from discord_tools.discord_formatting import *
-from randomwrapper.randomwrapper import dice_roll
-from speedrunapi.speedrunapi import *
-
-import re
+from discord_tools import outbound
+from discord_tools.outbound import say
+from discord_tools.plugins import FeatureUnavailable, features
+from discord_tools.timed_script import ScriptScheduler, TimedScript
+from discord_tools.triggers import TriggerDispatcher
+
+import argparse
+import asyncio
+import multiprocessing
+from functools import partial
 import time
+import traceback
 
 
-TOKEN = get_token()
-intents = Intents.default()
-intents.message_content = True
-client = Bot(command_prefix='!', status=Status.online, activity=Game("Azure Dreams"), intents=intents)
+client = None  # set by create_bot
 BOT_ID = '631144975366619146'
 COUNTDOWN_START = 10
+MAX_SCRIPTS_PER_CHANNEL = 2
+scheduler = ScriptScheduler(MAX_SCRIPTS_PER_CHANNEL)
+# each feature is a cog in its own extension, importing what it needs the first time one of its commands runs
+EXTENSIONS = ('cogs.adrando', 'cogs.bingo', 'cogs.dice', 'cogs.speedrun')
+extension_load_seconds = {}  # extension -> seconds taken by its last load, or None when it failed
+# each user may run this many commands per period (seconds)
+USER_COMMAND_RATE, USER_COMMAND_PER = 5, 10.0
+user_cooldowns = CooldownMapping.from_cooldown(USER_COMMAND_RATE, USER_COMMAND_PER, BucketType.user)
+# set to a file path to have the metrics written there in Prometheus text format
+METRICS_DUMP_PATH = None
+METRICS_DUMP_INTERVAL = 60
+# caches and other state shared by worker processes when sharding across several of them
+STATE_PATH = 'curry_state.db'
 
 # EMOJIS
 NICOHEY = '<:NicoHey:635538084062298122>'
 HORZASHOOK = '<:Horzashook:717744240670539788>'
-HEADS = '<:heads:1175710881183715401>'
-TAILS = '<:tails:1175711089997135872>'
+
+
+# SCRIPTS
+EARTHQUAKE_SCRIPT = TimedScript('earthquake', [
+    (curry_message("ANALYSING EARTHQUAKE%..."), 2),
+    (curry_message("A STRANGE GAME."), 0.5),
+    (curry_message("THE ONLY WINNING MOVE IS\nNOT TO PLAY."), 1),
+    (curry_message("HOW ABOUT A NICE GAME OF CURRY%?"), 0),
+])
+CURRY_SCRIPT = TimedScript('curry', [
+    (curry_message("The crystallization of the spices pop up here and there like crystal balls."), 0.5),
+    (curry_message("The curry made here is not aiming to be the high class curry at your common Indian restaurant,"), 0.5),
+    (curry_message("but more something you would enjoy at home, bringing out that homely flavor."), 0.5),
+    (curry_message("It's a taste that does not discriminate, that is fit for everyone."), 0.5),
+    (curry_message("Having said that, though, it's not something that you could make at home."), 0.5),
+    (curry_message("The smoothness and depth in it's taste is something only a professional chef could possibly make."), 1.5),
+    (curry_message("Munch Munch"), 0),
+])
+
+
+def countdown_script(start):
+    return TimedScript('countdown', [(curry_message("{}".format(start - n)), 1) for n in range(0, start)]
+                       + [(curry_message("Go!"), 0)])
+
 
 # EVENTS
-@client.event
 async def on_ready():
     print("Logged in as " + client.user.name)
+    metrics.start_loop_lag_monitor()
+    if METRICS_DUMP_PATH and not getattr(client, 'metrics_dump_task', None):
+        client.metrics_dump_task = asyncio.ensure_future(metrics.dump_periodically(METRICS_DUMP_PATH, METRICS_DUMP_INTERVAL))
 
 
-@client.event
 async def on_disconnect():
     await client.change_presence(activity=None, status=Status.offline)
     print("Disconnect")
 
 
-@client.event
 async def on_error(event_method, *args, **kwargs):
-    await client.change_presence(activity=None, status=Status.offline)
-    print("Error")
+    metrics.count('event_errors_total', event=event_method)
+    # one failing handler doesn't stop the others, so the bot stays online; on_error is called from inside the
+    # except block, so the exception is still at hand
+    print("Ignoring exception in {}:".format(event_method))
+    traceback.print_exc()
+
+
+async def start_command_timer(ctx):
+    ctx.started_at = time.perf_counter()
+
+
+async def record_command_latency(ctx):
+    metrics.observe('command_seconds', time.perf_counter() - ctx.started_at, command=ctx.command.name)
+
+
+async def throttle_user(ctx):
+    bucket = user_cooldowns.get_bucket(ctx.message)
+    retry_after = bucket.update_rate_limit()
+    if retry_after:
+        raise CommandOnCooldown(bucket, retry_after, BucketType.user)
+    return True
+
+
+async def count_command_error(ctx, error):
+    if isinstance(error, CommandOnCooldown):
+        metrics.count('command_throttled_total', command=ctx.command.name if ctx.command else 'unknown')
+        say(ctx.channel, curry_message("Slow down! Try again in {:.0f}s. Curry.".format(error.retry_after)))
+        return
+    if isinstance(error, CommandInvokeError) and isinstance(error.original, FeatureUnavailable):
+        # the import failure was already printed by the feature; the rest of the bot carries on without it
+        metrics.count('feature_unavailable_total', feature=error.original.name)
+        say(ctx.channel, curry_message("Sorry, {} isn't working right now. Curry.".format(ctx.command.name)))
+        return
+    metrics.count('command_errors_total', command=ctx.command.name if ctx.command else 'unknown')
+    # having a listener switches off the default handler, so print the traceback it would have
+    print("Ignoring exception in command {}:".format(ctx.command))
+    traceback.print_exception(type(error), error, error.__traceback__)
 
 
 # COMMANDS
-@client.command(description="for dev use", brief="(for dev use)")
+@command(description="for dev use", brief="(for dev use)")
 async def debug(ctx):
     pass
 
 
-@client.event
 async def on_message(message):
     if message.author.bot:
         return
-    curry_pattern = r"^curry\W*$"
-    if re.match(curry_pattern, message.content.lower()):
-        await message.channel.send(curry_message("?????"))
-    elif message.content.lower() in ("good bot", "good bot.", "good bot!"):
-        await message.channel.send(curry_message("{}. Aw, shucks!".format(get_author(message))))
-    elif message.content.lower() in ("bad bot", "bad bot.", "bad bot!"):
-        await message.channel.send(HORZASHOOK)
-    elif ("earthquake%" in message.content.lower() or "eq%" in message.content.lower()) and random.random() < 0.5:
-        await message.channel.send(curry_message("ANALYSING EARTHQUAKE%..."))
-        time.sleep(2)
-        await message.channel.send(curry_message("A STRANGE GAME."))
-        time.sleep(0.5)
-        await message.channel.send(curry_message("THE ONLY WINNING MOVE IS\nNOT TO PLAY."))
-        time.sleep(1)
-        await message.channel.send(curry_message("HOW ABOUT A NICE GAME OF CURRY%?"))
-    elif BOT_ID in message.content:
-        await message.channel.send(curry_message("Hey {} {}".format(get_author(message), NICOHEY)))
+    with metrics.timer('on_message_seconds'):
+        await triggers.dispatch(message)
     await client.process_commands(message)
 
 
-@client.command(description="Say Hello", brief="Say Hello")
+# TRIGGERS
+triggers = TriggerDispatcher()
+
+
+@triggers.regex(r"^curry\W*$")
+async def curry_trigger(message):
+    say(message.channel, curry_message("?????"))
+
+
+@triggers.exact("good bot", "good bot.", "good bot!")
+async def good_bot_trigger(message):
+    say(message.channel, curry_message("{}. Aw, shucks!".format(get_author(message))))
+
+
+@triggers.exact("bad bot", "bad bot.", "bad bot!")
+async def bad_bot_trigger(message):
+    say(message.channel, HORZASHOOK)
+
+
+@triggers.substring("earthquake%", "eq%", probability=0.5)
+async def earthquake_trigger(message):
+    scheduler.start(message.channel.id, EARTHQUAKE_SCRIPT, partial(say, message.channel))
+
+
+@triggers.mention(BOT_ID)
+async def mention_trigger(message):
+    say(message.channel, curry_message("Hey {} {}".format(get_author(message), NICOHEY)))
+
+
+@command(description="Say Hello", brief="Say Hello")
 async def hello(ctx):
-    await ctx.send(curry_message("Hello {}!".format(get_author(ctx.message))))
+    say(ctx.channel, curry_message("Hello {}!".format(get_author(ctx.message))))
 
 
-@client.command(description="Crystal Curry", brief="Curry")
+@command(description="Crystal Curry", brief="Curry")
 async def curry(ctx):
-    await ctx.send(curry_message("The crystallization of the spices pop up here and there like crystal balls."))
-    time.sleep(0.5)
-    await ctx.send(curry_message("The curry made here is not aiming to be the high class curry at your common Indian restaurant,"))
-    time.sleep(0.5)
-    await ctx.send(curry_message("but more something you would enjoy at home, bringing out that homely flavor."))
-    time.sleep(0.5)
-    await ctx.send(curry_message("It's a taste that does not discriminate, that is fit for everyone."))
-    time.sleep(0.5)
-    await ctx.send(curry_message("Having said that, though, it's not something that you could make at home."))
-    time.sleep(0.5)
-    await ctx.send(curry_message("The smoothness and depth in it's taste is something only a professional chef could possibly make."))
-    time.sleep(1.5)
-    await ctx.send(curry_message("Munch Munch"))
-
-
-@client.command(description="Creates a Bingo room at https://bingosync.com/ and provides the link and password.", brief="Create a Bingo game")
-async def bingo(ctx):
-    await ctx.send(curry_message("Creating Bingo room. Please wait a moment..."))
-    room_url, password = get_room()
-    if not room_url:
-        await ctx.send(curry_message("Error! I wasn't able to create the room. Curry."))
-    else:
-        await ctx.send(curry_message("...done. Room created at URL: {} with password: {}\nGo do your best! Don't stumble!".format(room_url, italics(password))))
-
-
-@client.command(description="Type '!adrando' to fetch the current seed link runners are playing on.\nType '!adrando <link>' to overwrite current seed with a new one of your choice.\nType '!adrando presets' for a list of presets.\nType '!adrando <preset>' to generate a seed of the given preset.\nType '!adrando <preset> <quantity>' to generate quantity seeds of the given preset.", brief="Make or get current adrando seeds")
-async def adrando(ctx, *args):
-    responses = AdrandoCommandHandler(args).handle()
-    await ctx.send('\n'.join(curry_message(response) for response in responses))
-
-@client.command(description="Type '!leaderboard <category>' to display the current leaderboard", brief="Fetch requested speedrun leaderboard")
-async def leaderboard(ctx, *args):
-    if not args:
-        await ctx.send(curry_message("No category supplied. Type '!help leaderboard' for more info. Curry."))
-    strings = []
-    is_name = True
-    for output in fetch_leaderboard(' '.join(args)):
-        if is_name:
-            is_name = False
-            await ctx.send(curry_message("Fetching {} leaderboard...".format(output)))
-            continue
-        rank, player, seconds = output
-        strings.append(curry_message("Rank: {}\tRunner: {}\t\tTime: {}".format(rank, player, str(Timestamp.from_milliseconds(seconds*1000)))))
-    await ctx.send('\n'.join(strings))
-
-
-@client.command(description="Type '!countdown' to start a countdown from {}.\nType '!countdown <start>' to countdown from start, where start is a positive integer <= {}.".format(COUNTDOWN_START, COUNTDOWN_START), brief="Start a countdown")
+    if not scheduler.start(ctx.channel.id, CURRY_SCRIPT, partial(say, ctx.channel)):
+        say(ctx.channel, curry_message("I'm too busy in this channel right now. Curry."))
+
+
+@command(description="Type '!countdown' to start a countdown from {}.\nType '!countdown <start>' to countdown from start, where start is a positive integer <= {}.\nType '!countdown stop' to cancel a running countdown.".format(COUNTDOWN_START, COUNTDOWN_START), brief="Start a countdown")
 async def countdown(ctx, *args):
-    if args and not args[0].isdigit():
-        await ctx.send(curry_message("I can't count starting from {}.".format(args[0])))
+    if args and args[0].lower() == 'stop':
+        if scheduler.cancel(ctx.channel.id, 'countdown'):
+            say(ctx.channel, curry_message("Countdown stopped."))
+        else:
+            say(ctx.channel, curry_message("There's no countdown to stop."))
+    elif args and not args[0].isdigit():
+        say(ctx.channel, curry_message("I can't count starting from {}.".format(args[0])))
     else:
         start = int(args[0]) if args else COUNTDOWN_START
         if start <= 0:
-            await ctx.send(curry_message("Why not just say 'go'?"))
+            say(ctx.channel, curry_message("Why not just say 'go'?"))
         elif start > COUNTDOWN_START:
-            await ctx.send(curry_message("That sounds like a lot of work. Ask me to start counting from {} or less.".format(COUNTDOWN_START)))
+            say(ctx.channel, curry_message("That sounds like a lot of work. Ask me to start counting from {} or less.".format(COUNTDOWN_START)))
+        elif scheduler.running(ctx.channel.id, 'countdown'):
+            say(ctx.channel, curry_message("There's already a countdown going in this channel. Type '!countdown stop' to cancel it."))
+        elif not scheduler.start(ctx.channel.id, countdown_script(start), partial(say, ctx.channel)):
+            say(ctx.channel, curry_message("I'm too busy in this channel right now. Curry."))
+
+
+@command(description="Show command latency, outbound HTTP and event loop statistics (bot owner only)", brief="(bot owner only)")
+@is_owner()
+async def stats(ctx):
+    lines = ["{:<14}{:>7}{:>9}{:>9}{:>9}{:>7}".format('command', 'calls', 'p50 ms', 'p95 ms', 'p99 ms', 'errors')]
+    command_errors = {dict(labels)['command']: n for labels, n in metrics.counters('command_errors_total').items()}
+    for command, calls, p50, p95, p99 in metrics.latency_summary('command_seconds', 'command'):
+        lines.append("{:<14}{:>7}{:>9.0f}{:>9.0f}{:>9.0f}{:>7}".format(command, calls, p50 * 1000, p95 * 1000, p99 * 1000, command_errors.get(command, 0)))
+    lines.append("{:<14}{:>7}{:>9}{:>9}{:>9}{:>7}".format('http', 'calls', 'p50 ms', 'p95 ms', 'p99 ms', 'errors'))
+    http_errors = {dict(labels)['integration']: n for labels, n in metrics.counters('http_errors_total').items()}
+    for integration, calls, p50, p95, p99 in metrics.latency_summary('http_request_seconds', 'integration'):
+        lines.append("{:<14}{:>7}{:>9.0f}{:>9.0f}{:>9.0f}{:>7}".format(integration, calls, p50 * 1000, p95 * 1000, p99 * 1000, http_errors.get(integration, 0)))
+    for name, label in (('on_message_seconds', 'on_message'), ('event_loop_lag_seconds', 'loop lag')):
+        for _, calls, p50, p95, p99 in metrics.latency_summary(name, ''):
+            lines.append("{:<14}{:>7}{:>9.0f}{:>9.0f}{:>9.0f}".format(label, calls, p50 * 1000, p95 * 1000, p99 * 1000))
+    lines.append("outbox {sent} messages sent, {merged} merged into others".format(**outbound.outbox.metrics()))
+    for cog in ctx.bot.cogs.values():
+        if hasattr(cog, 'stats_lines'):
+            lines.extend(cog.stats_lines())
+    say(ctx.channel, curry_message("Stats:\n```\n{}\n```".format('\n'.join(lines))))
+
+
+@command(description="Type '!reload <plugin>' to reload one of {} without reconnecting (bot owner only)".format(', '.join(name.split('.')[-1] for name in EXTENSIONS)), brief="(bot owner only)")
+@is_owner()
+async def reload(ctx, name):
+    extension = 'cogs.' + name.lower()
+    if extension not in EXTENSIONS:
+        say(ctx.channel, curry_message("I don't have a plugin called {}.".format(name)))
+        return
+    try:
+        if extension in ctx.bot.extensions:
+            timed_load(ctx.bot.reload_extension, extension)
         else:
-            for n in range(0, start):
-                await ctx.send(curry_message("{}".format(start - n)))
-                time.sleep(1)
-            await ctx.send(curry_message("Go!"))
+            timed_load(ctx.bot.load_extension, extension)
+    except ExtensionError as e:
+        print("Could not reload {}:".format(extension))
+        traceback.print_exception(type(e), e, e.__traceback__)
+        say(ctx.channel, curry_message("Couldn't reload {}: {}".format(name, e)))
+        return
+    say(ctx.channel, curry_message("Reloaded {}.".format(name)))
 
 
-@client.command(description="Flip a coin, resulting in Heads or Tails. Uses random bits from random.org", brief="Flip a coin")
-async def flip(ctx):
-    await ctx.send(curry_message("Flipping coin..."))
-    if dice_roll(1, 2) == 1:
-        await ctx.send(curry_message("Heads " + HEADS))
-    else:
-        await ctx.send(curry_message("Tails " + TAILS))
+@command(description="Show how long each plugin took to load and import (bot owner only)", brief="(bot owner only)")
+@is_owner()
+async def plugins(ctx):
+    say(ctx.channel, curry_message("Plugins:\n```\n{}\n```".format('\n'.join(profile_lines()))))
 
 
-@client.command(description="Roll n-sided dice. For instance '!roll 2d8' rolls two 8-sided dice and sums them. '!roll d20' rolls a 20-sided die. Uses random bits from random.org", brief="Roll dice")
-async def roll(ctx, *args):
-    if not args:
-        await ctx.send(curry_message("No argument supplied. Defaulting to d20..."))
-        num, sides = 1, 20
-    else:
-        arg = args[0].lower()
-        dice_pattern = r"^\d*d\d+$"
-        if re.match(dice_pattern, arg):
-            ints = [int(x) for x in arg.split('d') if x != '']
-            num = 1
-            if len(ints) > 1:
-                num = ints[0]
-            sides = ints[-1]
-        else:
-            await ctx.send(curry_message("Argument format not understood. See '!help roll'."))
-            return
-    if not (1 <= num <= 100 and 2 <= sides <= 100):
-        await ctx.send(curry_message("Numbers must be between 1d2 and 100d100 inclusive!"))
-        return
-    if num == 1:
-        await ctx.send(curry_message("Rolling a d{}...".format(sides)))
-    else:
-        await ctx.send(curry_message("Rolling {}d{}...".format(num, sides)))
-    result = dice_roll(num, sides)
-    await ctx.send(curry_message("Result: {}".format(result)))
-    if num == 1 and sides == 20 and result == 20:
-        await ctx.send(curry_message("Critical hit!"))
+def profile_lines():
+    lines = []
+    for extension in EXTENSIONS:
+        seconds = extension_load_seconds.get(extension)
+        lines.append("{:<16}{}".format(extension, "loaded in {:.1f} ms".format(seconds * 1000) if seconds is not None else "not loaded"))
+    for name, feature in sorted(features.items()):
+        lines.append("  {:<14}{}".format(name, feature.status()))
+    return lines
+
 
 # COMMANDS
-@client.command(description="About Curry Bot", brief="About Curry Bot")
+@command(description="About Curry Bot", brief="About Curry Bot")
 async def about(ctx):
-    await ctx.send(curry_message("Curry Bot is an open-source discord bot, available at https://github.com/HexTree/curry-bot\n")
-                   + curry_message("On the GitHub page you can find dev contacts, and submit bug/feedback.\n")
-                   + curry_message("The bot is run on an Amazon EC2 instance, 24/7. The server upkeep costs about $6 per month.\n")
-                   + curry_message("If you wish to support the running of the Bot, and future updates, you can donate via the following:\n")
-                   + curry_message("Ko-fi: <https://ko-fi.com/hextree>\n")
-                   + curry_message("Bitcoin: bc1qdw5hfljv5afrcqvm62c6pn5e98q2rvzj9558yx\n"))
-
-
-client.run(TOKEN)
+    say(ctx.channel, curry_message("Curry Bot is an open-source discord bot, available at https://github.com/HexTree/curry-bot\n")
+        + curry_message("On the GitHub page you can find dev contacts, and submit bug/feedback.\n")
+        + curry_message("The bot is run on an Amazon EC2 instance, 24/7. The server upkeep costs about $6 per month.\n")
+        + curry_message("If you wish to support the running of the Bot, and future updates, you can donate via the following:\n")
+        + curry_message("Ko-fi: <https://ko-fi.com/hextree>\n")
+        + curry_message("Bitcoin: bc1qdw5hfljv5afrcqvm62c6pn5e98q2rvzj9558yx\n"))
+
+
+# STARTUP
+EVENTS = [on_ready, on_disconnect, on_error, on_message]
+COMMANDS = [debug, hello, curry, countdown, stats, reload, plugins, about]
+
+
+def create_bot(shard_ids=None, shard_count=None, worker=(0, 1)):
+    # builds the bot without touching the network or creds.json; worker is (this process' index, number of
+    # processes), used to keep processes from handing out the same adrando seeds
+    global client
+    intents = Intents.default()
+    intents.message_content = True
+    options = dict(command_prefix='!', status=Status.online, activity=Game("Azure Dreams"), intents=intents)
+    if shard_count:
+        client = AutoShardedBot(shard_ids=shard_ids, shard_count=shard_count, **options)
+    else:
+        client = Bot(**options)
+    client.worker = worker
+    for event in EVENTS:
+        client.event(event)
+    for bot_command in COMMANDS:
+        client.add_command(bot_command)
+    # once per invocation; a plain check would also run for every command !help lists, using up the bucket
+    client.check_once(throttle_user)
+    client.before_invoke(start_command_timer)
+    client.after_invoke(record_command_latency)
+    client.add_listener(count_command_error, 'on_command_error')
+    for extension in EXTENSIONS:
+        try:
+            timed_load(client.load_extension, extension)
+        except ExtensionError as e:
+            # one broken plugin leaves the others, and the gateway connection, working
+            print("Could not load {}:".format(extension))
+            traceback.print_exception(type(e), e, e.__traceback__)
+    return client
+
+
+def timed_load(load, extension):
+    extension_load_seconds[extension] = None
+    start = time.perf_counter()
+    load(extension)
+    extension_load_seconds[extension] = time.perf_counter() - start
+
+
+def print_profile():
+    # imports every feature up front, as the first command of each would, and reports what each one costs
+    start = time.perf_counter()
+    create_bot()
+    for feature in list(features.values()):
+        try:
+            feature.get()
+        except FeatureUnavailable:
+            pass
+    print('\n'.join(profile_lines()))
+    print("total {:.1f} ms".format((time.perf_counter() - start) * 1000))
+
+
+def run_worker(token, shard_ids, shard_count, worker, state_path):
+    set_backend(InProcessBackend() if state_path == 'memory' else SqliteBackend(state_path))
+    if shard_ids is not None:
+        print("Worker {} running shards {}".format(worker[0], shard_ids))
+    create_bot(shard_ids, shard_count, worker).run(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run Curry Bot")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="number of gateway shards (default: one unsharded connection)")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="worker processes to spread the shards over")
+    parser.add_argument('--state', default=STATE_PATH,
+                        help="SQLite file for caches shared between processes, or 'memory' to keep them in-process")
+    parser.add_argument('--profile', action='store_true',
+                        help="print how long each plugin takes to load and import, then exit without connecting")
+    args = parser.parse_args()
+    if args.profile:
+        print_profile()
+        return
+    if args.processes > 1 and args.shards < args.processes:
+        parser.error("--processes needs at least as many --shards")
+    if args.processes > 1 and args.state == 'memory':
+        parser.error("worker processes can only share state through a file, not 'memory'")
+    token = get_token()
+    if args.processes == 1:
+        shard_ids = list(range(args.shards)) if args.shards else None
+        run_worker(token, shard_ids, args.shards or None, (0, 1), args.state)
+        return
+    # spawned rather than forked, so no worker inherits another's sockets or event loop
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, name='curry-bot-{}'.format(index),
+                               args=(token, list(range(index, args.shards, args.processes)), args.shards,
+                                     (index, args.processes), args.state))
+               for index in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+if __name__ == '__main__':
+    main()
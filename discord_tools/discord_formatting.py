@@ -1,3 +1,5 @@
+from discord_tools.outbound import MESSAGE_LIMIT
+
 CURRY = '<:Curry:689531071217270878>'
 
 
@@ -18,4 +20,18 @@ def curry_format(s, *args):
 
 
 def get_author(message):
-    return str(message.author)[:str(message.author).find('#')]
\ No newline at end of file
+    return str(message.author)[:str(message.author).find('#')]
+
+
+def chunk_lines(lines, limit=MESSAGE_LIMIT):
+    # joins lines into as few messages as fit the limit, without splitting a line unless it is too long on its own
+    chunk = ''
+    for line in lines:
+        line = line[:limit]
+        if chunk and len(chunk) + 1 + len(line) > limit:
+            yield chunk
+            chunk = line
+        else:
+            chunk = chunk + '\n' + line if chunk else line
+    if chunk:
+        yield chunk
@@ -0,0 +1,40 @@
+# stand-ins for the nextcord objects the command handlers touch, shared by the tests and the load test
+
+
+class FakeAuthor:
+    def __init__(self, user_id=1):
+        self.id = user_id
+        self.bot = False
+
+    def __str__(self):
+        return 'runner{}#0001'.format(self.id)
+
+
+class FakeChannel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.messages = []
+
+    async def send(self, content):
+        self.messages.append(content)
+        return content
+
+
+class FakeGuild:
+    id = 1
+
+
+class FakeMessage:
+    def __init__(self, content, author=None, channel=None):
+        self.content = content
+        self.author = author or FakeAuthor()
+        self.channel = channel or FakeChannel()
+        self.guild = FakeGuild
+
+
+class FakeContext:  # the parts of a nextcord Context the command handlers use
+    def __init__(self, message):
+        self.message = message
+        self.channel = message.channel
+        self.guild = message.guild
+        self.author = message.author
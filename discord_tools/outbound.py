@@ -0,0 +1,99 @@
+import asyncio
+import time
+from collections import deque
+
+MESSAGE_LIMIT = 2000
+# discord allows 5 messages per 5 seconds in a channel, and 50 requests per second for the whole bot
+CHANNEL_RATE, CHANNEL_PER = 5, 5.0
+GLOBAL_RATE, GLOBAL_PER = 50, 1.0
+
+
+class TokenBucket:
+    def __init__(self, rate, per):
+        self._rate = rate
+        self._per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate / self._per)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) * self._per / self._rate)
+
+
+class ChannelQueue:
+    def __init__(self, channel, bucket, global_bucket):
+        self._channel = channel
+        self._bucket = bucket
+        self._global_bucket = global_bucket
+        self._pending = deque()  # (content, future)
+        self._worker = None
+        self.sent = 0
+        self.merged = 0
+
+    def send(self, content):
+        future = asyncio.get_running_loop().create_future()
+        # failures are printed by the worker, so a caller that never awaits the future doesn't get a warning too
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._pending.append((content, future))
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._drain())
+        return future
+
+    async def _drain(self):
+        while self._pending:
+            await self._bucket.acquire()
+            await self._global_bucket.acquire()
+            # whatever queued up while we waited for the rate limit goes out as one message, in order
+            content, future = self._pending.popleft()
+            futures = [future]
+            while self._pending and len(content) + 1 + len(self._pending[0][0]) <= MESSAGE_LIMIT:
+                next_content, next_future = self._pending.popleft()
+                content += '\n' + next_content
+                futures.append(next_future)
+            try:
+                message = await self._channel.send(content)
+            except Exception as e:
+                print("Could not send to channel {}: {!r}".format(getattr(self._channel, 'id', self._channel), e))
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.sent += 1
+            self.merged += len(futures) - 1
+            for future in futures:
+                if not future.done():
+                    future.set_result(message)
+
+
+class Outbox:  # outbound messages queued per channel, merged where possible and paced to discord's rate limits
+    def __init__(self, channel_rate=CHANNEL_RATE, channel_per=CHANNEL_PER, global_rate=GLOBAL_RATE, global_per=GLOBAL_PER):
+        self._channel_rate = channel_rate
+        self._channel_per = channel_per
+        self._global_bucket = TokenBucket(global_rate, global_per)
+        self._queues = {}  # channel id -> ChannelQueue
+
+    def send(self, channel, content):
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = ChannelQueue(
+                channel, TokenBucket(self._channel_rate, self._channel_per), self._global_bucket)
+        return queue.send(content)
+
+    def metrics(self):
+        sent = sum(queue.sent for queue in self._queues.values())
+        merged = sum(queue.merged for queue in self._queues.values())
+        return {'channels': len(self._queues), 'sent': sent, 'merged': merged}
+
+
+outbox = Outbox()
+
+
+def say(channel, content):
+    # queued rather than sent straight away, so a burst of replies goes out as fewer messages
+    return outbox.send(channel, content)
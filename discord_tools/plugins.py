@@ -0,0 +1,58 @@
+import importlib
+import sys
+import time
+import traceback
+
+# every LazyFeature by name, for the startup profile
+features = {}
+
+
+class FeatureUnavailable(Exception):
+    def __init__(self, name):
+        super().__init__(name)
+        self.name = name
+
+
+class LazyFeature:  # the modules behind a cog, imported the first time one of its commands needs them
+    def __init__(self, name, modules):
+        # modules are imported in order, dependencies first; get() hands back the last one unless asked for another
+        self.name = name
+        self._modules = modules
+        self.modules = None  # module name -> module, once imported
+        self.import_seconds = None
+        self.error = None
+        # a cog being reloaded brings a new LazyFeature, which reloads the modules its predecessor imported
+        self._reload = name in features and features[name].loaded
+        features[name] = self
+
+    def get(self, name=None):
+        if self.modules is None:
+            start = time.perf_counter()
+            modules = {}
+            try:
+                for module_name in self._modules:
+                    if self._reload and module_name in sys.modules:
+                        modules[module_name] = importlib.reload(sys.modules[module_name])
+                    else:
+                        modules[module_name] = importlib.import_module(module_name)
+            except Exception as e:
+                self.error = e
+                print("Could not import the {} feature:".format(self.name))
+                traceback.print_exc()
+                raise FeatureUnavailable(self.name) from e
+            self.import_seconds = time.perf_counter() - start
+            self.error = None
+            self._reload = False
+            self.modules = modules
+        return self.modules[name or self._modules[-1]]
+
+    @property
+    def loaded(self):
+        return self.modules is not None
+
+    def status(self):
+        if self.modules is not None:
+            return "imported in {:.1f} ms".format(self.import_seconds * 1000)
+        if self.error is not None:
+            return "failed: {!r}".format(self.error)
+        return "not imported yet"
@@ -0,0 +1,48 @@
+import asyncio
+
+
+class TimedScript:
+    def __init__(self, name, steps):
+        # steps are (message, seconds to wait after sending it) pairs
+        self.name = name
+        self._steps = list(steps)
+
+    async def play(self, send):
+        for message, delay in self._steps:
+            await send(message)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+
+class ScriptScheduler:
+    def __init__(self, max_per_channel):
+        self._max_per_channel = max_per_channel
+        self._running = {}  # channel id -> {task: script name}
+
+    def start(self, channel_id, script, send):
+        scripts = self._running.setdefault(channel_id, {})
+        if len(scripts) >= self._max_per_channel:
+            return None
+        task = asyncio.ensure_future(script.play(send))
+        scripts[task] = script.name
+        task.add_done_callback(lambda finished: self._finish(channel_id, finished))
+        return task
+
+    def cancel(self, channel_id, name=None):
+        scripts = self._running.get(channel_id, {})
+        cancelled = [task for task, script_name in scripts.items() if name is None or script_name == name]
+        for task in cancelled:
+            task.cancel()
+        return len(cancelled)
+
+    def running(self, channel_id, name=None):
+        scripts = self._running.get(channel_id, {})
+        return sum(1 for script_name in scripts.values() if name is None or script_name == name)
+
+    def _finish(self, channel_id, task):
+        scripts = self._running.get(channel_id, {})
+        name = scripts.pop(task, None)
+        if not scripts:
+            self._running.pop(channel_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            print("Timed script {} failed: {!r}".format(name, task.exception()))
@@ -0,0 +1,91 @@
+import random
+import re
+import time
+
+
+class Trigger:
+    def __init__(self, name, action, probability, cooldown):
+        self.name = name
+        self.action = action
+        self.probability = probability
+        self.cooldown = cooldown
+        self.last_fired = {}  # channel id -> monotonic time
+
+
+class TriggerDispatcher:  # message triggers, checked in registration order, with the first that fires winning
+    def __init__(self):
+        self._triggers = []
+        self._exact = {}  # lowercased phrase -> trigger indices
+        self._substrings = []  # (lowercased substring, trigger index)
+        self._patterns = []  # (trigger index, regex source that must match at the start of the message)
+        self._pattern_groups = []  # (trigger index, number of its group in the matcher)
+        self._matcher = None
+
+    def exact(self, *phrases, probability=1.0, cooldown=0):
+        def register(action):
+            index = self._add(action, probability, cooldown)
+            for phrase in phrases:
+                self._exact.setdefault(phrase.lower(), []).append(index)
+            return action
+        return register
+
+    def regex(self, pattern, probability=1.0, cooldown=0):
+        def register(action):
+            self._patterns.append((self._add(action, probability, cooldown), pattern))
+            return action
+        return register
+
+    def substring(self, *substrings, probability=1.0, cooldown=0):
+        def register(action):
+            index = self._add(action, probability, cooldown)
+            self._substrings.extend((substring.lower(), index) for substring in substrings)
+            return action
+        return register
+
+    def mention(self, user_id, probability=1.0, cooldown=0):
+        return self.substring(str(user_id), probability=probability, cooldown=cooldown)
+
+    def match(self, content, channel_id=None):
+        if self._matcher is None:
+            self._compile()
+        content = content.lower()
+        matched = self._exact.get(content, [])
+        # for a handful of needles, str's own substring search beats a combined regex or a pure python automaton
+        for substring, index in self._substrings:
+            if substring in content:
+                matched = matched + [index]
+        groups = self._matcher.match(content)
+        if groups.lastindex is not None:
+            matched = matched + [index for index, group in self._pattern_groups if groups.group(group) is not None]
+        if not matched:
+            return None
+        now = time.monotonic()
+        for index in sorted(set(matched)):
+            trigger = self._triggers[index]
+            if trigger.cooldown and now - trigger.last_fired.get(channel_id, float('-inf')) < trigger.cooldown:
+                continue
+            if trigger.probability < 1.0 and random.random() >= trigger.probability:
+                continue
+            if trigger.cooldown:
+                trigger.last_fired[channel_id] = now
+            return trigger
+        return None
+
+    async def dispatch(self, message):
+        trigger = self.match(message.content, message.channel.id)
+        if trigger is None:
+            return False
+        await trigger.action(message)
+        return True
+
+    def _add(self, action, probability, cooldown):
+        self._triggers.append(Trigger(action.__name__, action, probability, cooldown))
+        self._matcher = None
+        return len(self._triggers) - 1
+
+    def _compile(self):
+        # every regex trigger becomes an optional lookahead at the start of the message, capturing (as a possibly
+        # empty group) whether it matched, so a single match call tells which of them apply
+        source = ''.join('(?:(?=(?P<t{}>{})))?'.format(index, pattern) for index, pattern in self._patterns)
+        self._matcher = re.compile(source)
+        self._pattern_groups = [(index, self._matcher.groupindex['t{}'.format(index)]) for index, _ in self._patterns]
@@ -0,0 +1,328 @@
+import re
+from functools import lru_cache
+
+# limits per expression, so one message can't tie the bot up
+MAX_DICE = 10000
+MAX_SIDES = 1000
+MAX_CONSTANT = 1000000
+# an exploding die rolls again at most this many times; stats are exact for the same cap
+MAX_EXPLOSIONS = 10
+# rough number of steps !roll stats may take to work out a distribution; a step was about 0.1 microseconds when
+# measured, so this is about a second (e.g. 300d20, 40d20kh20 or 10d10!, but not 1000d20 or 50d6!)
+MAX_STATS_WORK = 10 ** 7
+# the exact counts run to thousands of bits for big pools, and each this many bits makes a step cost about one more
+BITS_PER_STEP = 2000
+# individual dice are only listed for pools this small, and the terms of a sum only when there are this few
+MAX_LISTED_DICE = 20
+
+TERM_PATTERN = re.compile(r'([+-]?)(?:(\d*)d(\d+)((?:k[hl]?\d+|d[hl]\d+|!)*)|(\d+))')
+MODIFIER_PATTERN = re.compile(r'(k[hl]?|d[hl])(\d+)|!')
+
+
+class DiceError(Exception):
+    pass
+
+
+class Distribution:  # exact outcome counts: counts[i] ways to total offset + i, out of total equally likely ways
+    __slots__ = ('offset', 'counts', 'total')
+
+    def __init__(self, offset, counts, total):
+        self.offset = offset
+        self.counts = counts
+        self.total = total
+
+    def __add__(self, other):
+        counts = [0] * (len(self.counts) + len(other.counts) - 1)
+        for i, a in enumerate(self.counts):
+            if a:
+                for j, b in enumerate(other.counts):
+                    counts[i + j] += a * b
+        return Distribution(self.offset + other.offset, counts, self.total * other.total)
+
+    def __neg__(self):
+        return Distribution(-(self.offset + len(self.counts) - 1), self.counts[::-1], self.total)
+
+    def times(self, n):
+        # the sum of n independent copies, by repeated squaring
+        result, power = None, self
+        while n:
+            if n & 1:
+                result = power if result is None else result + power
+            n >>= 1
+            if n:
+                power = power + power
+        return result
+
+    def mean(self):
+        return sum(i * count for i, count in enumerate(self.counts)) / self.total + self.offset
+
+    def stdev(self):
+        first = sum(i * count for i, count in enumerate(self.counts))
+        second = sum(i * i * count for i, count in enumerate(self.counts))
+        return ((second * self.total - first * first) / (self.total * self.total)) ** 0.5
+
+    def percentile(self, q):
+        # smallest total with at least q of the outcomes at or below it; q is a whole percentage
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen * 100 >= q * self.total:
+                return self.offset + i
+        return self.offset + len(self.counts) - 1
+
+    def mode(self):
+        i = max(range(len(self.counts)), key=self.counts.__getitem__)
+        return self.offset + i, self.counts[i] / self.total
+
+    def probabilities(self):
+        return [(self.offset + i, count / self.total) for i, count in enumerate(self.counts)]
+
+
+class Constant:
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def dice(self):
+        return 0
+
+    def roll(self, roll_dice):
+        return self.value, str(self.value)
+
+    def span(self):
+        return 1, 0
+
+    def work(self):
+        return 0
+
+    def distribution(self):
+        return Distribution(self.value, [1], 1)
+
+    def __str__(self):
+        return str(self.value)
+
+
+class DicePool:  # NdS, optionally keeping the highest or lowest k dice, optionally exploding on the top face
+    __slots__ = ('count', 'sides', 'keep', 'highest', 'explode')
+
+    def __init__(self, count, sides, keep=None, highest=True, explode=False):
+        self.count = count
+        self.sides = sides
+        self.keep = keep
+        self.highest = highest
+        self.explode = explode
+
+    def dice(self):
+        return self.count
+
+    def roll(self, roll_dice):
+        # roll_dice(count, sides) returns count rolls between 1 and sides, drawn in one batch
+        rolls = roll_dice(self.count, self.sides)
+        if self.explode:
+            exploding = [i for i, value in enumerate(rolls) if value == self.sides]
+            for _ in range(MAX_EXPLOSIONS):
+                if not exploding:
+                    break
+                extra = roll_dice(len(exploding), self.sides)
+                for i, value in zip(exploding, extra):
+                    rolls[i] += value
+                exploding = [i for i, value in zip(exploding, extra) if value == self.sides]
+        kept = set(range(self.count))
+        if self.keep is not None and self.keep < self.count:
+            order = sorted(range(self.count), key=rolls.__getitem__, reverse=self.highest)
+            kept = set(order[:self.keep])
+        total = sum(rolls[i] for i in kept)
+        if self.count > MAX_LISTED_DICE:
+            return total, '({} dice)'.format(self.count)
+        return total, '[{}]'.format(', '.join(str(value) if i in kept else '~~{}~~'.format(value)
+                                              for i, value in enumerate(rolls)))
+
+    def span(self):
+        # how many totals are possible, and roughly how many bits the count of all outcomes takes
+        rolls = MAX_EXPLOSIONS + 1 if self.explode else 1
+        if self.keep is not None and self.keep < self.count:
+            return self.keep * (self.sides - 1) + 1, self.count * self.sides.bit_length()
+        return self.count * (rolls * self.sides - 1) + 1, self.count * rolls * self.sides.bit_length()
+
+    def work(self):
+        # estimated steps for distribution(), each shape's formula fitted to timings of that algorithm
+        _, bits = self.span()
+        if self.keep is not None and self.keep < self.count:
+            if self.explode:
+                raise DiceError("I can't work out stats for exploding dice that are kept or dropped.")
+            return _weighted(self.count * self.count * self.keep * self.sides * self.sides // 2, bits)
+        if not self.explode:
+            return _weighted(self.count * self.count * self.sides, bits)
+        return _weighted((self.count * (MAX_EXPLOSIONS + 1) * self.sides) ** 2 * 3 // 2, bits)
+
+    def distribution(self):
+        _check_work(self.work())
+        if self.keep is not None and self.keep < self.count:
+            return self._kept_distribution()
+        if not self.explode:
+            return self._uniform_sum()
+        return self._exploding_die().times(self.count)
+
+    def _uniform_sum(self):
+        # adding one die is a sliding window sum over the previous counts
+        counts = [1]
+        for _ in range(self.count):
+            window = 0
+            summed = []
+            for i in range(len(counts) + self.sides - 1):
+                if i < len(counts):
+                    window += counts[i]
+                if i >= self.sides:
+                    window -= counts[i - self.sides]
+                summed.append(window)
+            counts = summed
+        return Distribution(self.count, counts, self.sides ** self.count)
+
+    def _exploding_die(self):
+        # after k explosions the die shows k * sides plus a final face, with weight sides ** (MAX_EXPLOSIONS - k)
+        # out of sides ** (MAX_EXPLOSIONS + 1); the final roll after the last allowed explosion may be the top face
+        counts = [0] * ((MAX_EXPLOSIONS + 1) * self.sides)
+        for k in range(MAX_EXPLOSIONS + 1):
+            weight = self.sides ** (MAX_EXPLOSIONS - k)
+            for face in range(1, self.sides if k < MAX_EXPLOSIONS else self.sides + 1):
+                counts[k * self.sides + face - 1] += weight
+        return Distribution(1, counts, self.sides ** (MAX_EXPLOSIONS + 1))
+
+    def _kept_distribution(self):
+        # walks the faces from the kept end, choosing how many dice show each one; ways[(dice placed, kept)] is a
+        # dict of kept total -> number of ordered outcomes
+        faces = range(self.sides, 0, -1) if self.highest else range(1, self.sides + 1)
+        binomials = [[1]]
+        for n in range(1, self.count + 1):
+            binomials.append([1] + [binomials[n - 1][k - 1] + binomials[n - 1][k] for k in range(1, n)] + [1])
+        ways = {(0, 0): {0: 1}}
+        for face in faces:
+            next_ways = {}
+            for (placed, kept), totals in ways.items():
+                for showing in range(self.count - placed + 1):
+                    choose = binomials[self.count - placed][showing]
+                    kept_here = min(showing, self.keep - kept)
+                    target = next_ways.setdefault((placed + showing, kept + kept_here), {})
+                    for total, count in totals.items():
+                        key = total + kept_here * face
+                        target[key] = target.get(key, 0) + count * choose
+            ways = next_ways
+        totals = {}
+        for (placed, _), kept_totals in ways.items():
+            if placed == self.count:
+                for total, count in kept_totals.items():
+                    totals[total] = totals.get(total, 0) + count
+        low = min(totals)
+        counts = [totals.get(low + i, 0) for i in range(max(totals) - low + 1)]
+        return Distribution(low, counts, self.sides ** self.count)
+
+    def __str__(self):
+        text = '{}d{}'.format(self.count, self.sides)
+        if self.keep is not None and self.keep < self.count:
+            text += '{}{}'.format('kh' if self.highest else 'kl', self.keep)
+        return text + ('!' if self.explode else '')
+
+
+class Sum:  # terms added or subtracted left to right
+    __slots__ = ('terms',)
+
+    def __init__(self, terms):
+        self.terms = terms  # (sign, node)
+
+    def dice(self):
+        return sum(node.dice() for _, node in self.terms)
+
+    def roll(self, roll_dice):
+        total = 0
+        parts = []
+        for sign, node in self.terms:
+            value, detail = node.roll(roll_dice)
+            total += sign * value
+            parts.append(('- ' if sign < 0 else '+ ' if parts else '') + detail)
+        # many small pools, e.g. d6+d6+...+d6, would otherwise list past discord's message limit
+        if self.dice() > MAX_LISTED_DICE or len(self.terms) > MAX_LISTED_DICE:
+            return total, '({} dice)'.format(self.dice())
+        return total, ' '.join(parts)
+
+    def span(self):
+        spans = [node.span() for _, node in self.terms]
+        return sum(span for span, _ in spans) - len(spans) + 1, sum(bits for _, bits in spans)
+
+    def work(self):
+        # every term's own work, plus adding each one's distribution to the running total
+        work = sum(node.work() for _, node in self.terms)
+        total_span, total_bits = self.terms[0][1].span()
+        for _, node in self.terms[1:]:
+            span, bits = node.span()
+            work += _weighted(total_span * span * 3, total_bits + bits)
+            total_span, total_bits = total_span + span - 1, total_bits + bits
+        return work
+
+    def distribution(self):
+        # checked up front for the whole expression, so a refusal doesn't come after seconds of work
+        _check_work(self.work())
+        result = None
+        for sign, node in self.terms:
+            distribution = node.distribution() if sign > 0 else -node.distribution()
+            result = distribution if result is None else result + distribution
+        return result
+
+    def __str__(self):
+        return ''.join(('-' if sign < 0 else '+' if i else '') + str(node) for i, (sign, node) in enumerate(self.terms))
+
+
+def _weighted(steps, bits):
+    return steps * (1 + bits / BITS_PER_STEP)
+
+
+def _check_work(work):
+    if work > MAX_STATS_WORK:
+        raise DiceError("That's too many dice to work out stats for.")
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text):
+    # e.g. "4d6kh3+2", "10d10!", "d20-1", "8d6dl2"; raises DiceError when the text isn't a dice expression
+    source = ''.join(text.lower().split())
+    terms = []
+    position = 0
+    while position < len(source):
+        match = TERM_PATTERN.match(source, position)
+        if match is None or match.end() == position or (terms and not match.group(1)):
+            raise DiceError("I don't understand {}.".format(text))
+        sign, count, sides, modifiers, constant = match.groups()
+        if constant is not None:
+            if int(constant) > MAX_CONSTANT:
+                raise DiceError("{} is too big a number.".format(constant))
+            node = Constant(int(constant))
+        else:
+            node = _dice_pool(int(count) if count else 1, int(sides), modifiers)
+        terms.append((-1 if sign == '-' else 1, node))
+        position = match.end()
+    if not terms:
+        raise DiceError("There's nothing to roll.")
+    expression = Sum(terms) if len(terms) > 1 or terms[0][0] < 0 else terms[0][1]
+    if expression.dice() > MAX_DICE:
+        raise DiceError("That's more than {} dice.".format(MAX_DICE))
+    return expression
+
+
+def _dice_pool(count, sides, modifiers):
+    if not 1 <= count <= MAX_DICE or not 2 <= sides <= MAX_SIDES:
+        raise DiceError("Dice must be between 1d2 and {}d{}.".format(MAX_DICE, MAX_SIDES))
+    keep, highest, explode = None, True, False
+    for match in MODIFIER_PATTERN.finditer(modifiers):
+        if match.group(0) == '!':
+            explode = True
+            continue
+        if keep is not None:
+            raise DiceError("Only one keep or drop per dice pool.")
+        kind, n = match.group(1), int(match.group(2))
+        if kind in ('k', 'kh', 'kl'):
+            keep, highest = n, kind != 'kl'
+        else:
+            keep, highest = count - n, kind == 'dl'
+        if not 1 <= keep <= count:
+            raise DiceError("Can't keep {} of {} dice.".format(keep, count))
+    return DicePool(count, sides, keep, highest, explode)
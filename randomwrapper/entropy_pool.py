@@ -0,0 +1,115 @@
+import asyncio
+
+
+class ByteRing:  # bounded FIFO of random bytes backed by a single bytearray
+    def __init__(self, capacity):
+        self._buffer = bytearray(capacity)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self):
+        return len(self._buffer)
+
+    def extend(self, data):
+        data = data[:self.capacity - self._size]
+        end = (self._start + self._size) % self.capacity
+        first = min(len(data), self.capacity - end)
+        self._buffer[end:end + first] = data[:first]
+        self._buffer[:len(data) - first] = data[first:]
+        self._size += len(data)
+        return len(data)
+
+    def take(self, n):
+        if n > self._size:
+            return None
+        end = self._start + n
+        if end <= self.capacity:
+            data = bytes(self._buffer[self._start:end])
+        else:
+            data = bytes(self._buffer[self._start:]) + bytes(self._buffer[:end - self.capacity])
+        self._start = end % self.capacity
+        self._size -= n
+        return data
+
+
+class EntropyPool:
+    def __init__(self, source, low_water, high_water, batch_size):
+        # source is a coroutine function taking a byte count and returning that many random bytes
+        self._source = source
+        self._low_water = low_water
+        self._batch_size = batch_size
+        self._ring = ByteRing(high_water)
+        self._refill_task = None
+        self.hits = 0
+        self.fallbacks = 0
+        self.refills = 0
+        self.refill_errors = 0
+
+    def randbelow_many(self, count, n):
+        # count uniform integers in [0, n), decoded from whole slices of the pool, or None if the pool ran dry
+        width = max(1, ((n - 1).bit_length() + 7) // 8)
+        space = 256 ** width
+        limit = space - space % n
+        # a request the pool can't cover leaves it untouched for the rolls it can, e.g. 5000d6 with 4096 bytes
+        if -(-count * space // limit) * width > len(self._ring):
+            return None
+        values = []
+        while len(values) < count:
+            # a little more than is needed, to make up for the draws rejection sampling throws away
+            draws = min((count - len(values)) * space // limit + 1, len(self._ring) // width)
+            if not draws:
+                return None
+            data = self._ring.take(draws * width)
+            if width == 1:
+                values.extend(byte % n for byte in data if byte < limit)
+            else:
+                draws = (int.from_bytes(data[i:i + width], 'big') for i in range(0, len(data), width))
+                values.extend(value % n for value in draws if value < limit)
+        del values[count:]
+        return values
+
+    def dice(self, num, sides):
+        values = self.randbelow_many(num, sides)
+        self.top_up()
+        if values is None:
+            self.fallbacks += 1
+            return None
+        self.hits += 1
+        return [value + 1 for value in values]
+
+    def top_up(self):
+        if len(self._ring) >= self._low_water or (self._refill_task and not self._refill_task.done()):
+            return
+        try:
+            self._refill_task = asyncio.get_running_loop().create_task(self.refill())
+        except RuntimeError:
+            pass  # no event loop to refill from; callers keep falling back until there is one
+
+    async def refill(self):
+        while len(self._ring) < self._ring.capacity:
+            try:
+                data = await self._source(min(self._batch_size, self._ring.capacity - len(self._ring)))
+            except Exception as e:
+                self.refill_errors += 1
+                print("Entropy refill failed: {!r}".format(e))
+                return
+            if not data:
+                return
+            self._ring.extend(data)
+            self.refills += 1
+
+    def metrics(self):
+        served = self.hits + self.fallbacks
+        return {'size': len(self._ring),
+                'capacity': self._ring.capacity,
+                'low_water': self._low_water,
+                'hits': self.hits,
+                'fallbacks': self.fallbacks,
+                'hit_rate': self.hits / served if served else 0.0,
+                'fallback_rate': self.fallbacks / served if served else 0.0,
+                'refills': self.refills,
+                'refill_errors': self.refill_errors}
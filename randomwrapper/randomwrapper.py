@@ -1,28 +1,42 @@
 import random
-import requests
+
+from common.http_client import get_client
+from randomwrapper.entropy_pool import EntropyPool
 
 URL = 'https://www.random.org/integers/'
 DATA = {'base': 10,
         'format': 'plain',
-        'rnd': 'new'}
+        'rnd': 'new',
+        'col': 1,
+        'min': 0,
+        'max': 255}
+# random.org serves at most 10000 integers per request
+MAX_BATCH_SIZE = 10000
+
+# pool sizes in bytes; a refill starts when the pool drops below LOW_WATER and fills it back up to HIGH_WATER
+ENTROPY_LOW_WATER = 512
+ENTROPY_HIGH_WATER = 4096
+ENTROPY_BATCH_SIZE = 2048
 
 
-def dice_roll_random_org(num, sides):
+async def fetch_random_org_bytes(num):
     data = DATA.copy()
-    data['num'] = num
-    data['col'] = num
-    data['min'] = 1
-    data['max'] = sides
-    res = requests.get(URL, data)
-    if res.status_code != 200:
-        print(res)
-        return -1
-    return sum(int(x) for x in res.text.split())
-
-
-def dice_roll(num, sides):
-    result = dice_roll_random_org(num, sides)
-    if result == -1:
+    data['num'] = min(num, MAX_BATCH_SIZE)
+    res = await get_client().get(URL, params=data)
+    return bytes(int(x) for x in res.text.split())
+
+
+entropy_pool = EntropyPool(fetch_random_org_bytes, ENTROPY_LOW_WATER, ENTROPY_HIGH_WATER, ENTROPY_BATCH_SIZE)
+
+
+def roll_dice(num, sides):
+    # num rolls drawn in one batch from the pool
+    rolls = entropy_pool.dice(num, sides)
+    if rolls is None:
         # fall back to regular python random
-        return sum(random.randint(1, sides) for _ in range(num))
-    return result
+        return [random.randint(1, sides) for _ in range(num)]
+    return rolls
+
+
+async def dice_roll(num, sides):
+    return sum(roll_dice(num, sides))
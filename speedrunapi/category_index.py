@@ -0,0 +1,53 @@
+import re
+from collections import defaultdict
+
+NON_ALPHANUMERIC = re.compile(r'[^0-9a-z]+')
+
+
+def normalise(name):
+    # "Any% (No Warp)" -> "any no warp", so "any" and "any%" find the same category
+    return NON_ALPHANUMERIC.sub(' ', name.lower()).strip()
+
+
+def trigrams(text):
+    padded = ' {} '.format(text)
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CategoryIndex:
+    def __init__(self):
+        self._entries = []  # (display name, value)
+        self._keys = []  # (entry id, trigram count) for each name and alias
+        self._exact = {}  # normalised key -> entry ids
+        self._postings = defaultdict(list)  # trigram -> key ids
+
+    def add(self, name, value, aliases=()):
+        entry_id = len(self._entries)
+        self._entries.append((name, value))
+        for key in {normalise(key) for key in (name,) + tuple(aliases)}:
+            self._exact.setdefault(key, []).append(entry_id)
+            grams = trigrams(key)
+            key_id = len(self._keys)
+            self._keys.append((entry_id, len(grams)))
+            for gram in grams:
+                self._postings[gram].append(key_id)
+
+    def search(self, query, limit=5):
+        key = normalise(query)
+        scores = dict.fromkeys(self._exact.get(key, ()), 1.0)
+        grams = trigrams(key)
+        shared = defaultdict(int)
+        for gram in grams:
+            for key_id in self._postings.get(gram, ()):
+                shared[key_id] += 1
+        for key_id, count in shared.items():
+            entry_id, key_size = self._keys[key_id]
+            # Dice coefficient over trigram sets, keeping the best scoring key of each entry
+            score = 2.0 * count / (len(grams) + key_size)
+            if score > scores.get(entry_id, 0.0):
+                scores[entry_id] = score
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(self._entries[item[0]][0])))
+        return [(score, ) + self._entries[entry_id] for entry_id, score in ranked[:limit]]
+
+    def __len__(self):
+        return len(self._entries)
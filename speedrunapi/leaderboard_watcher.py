@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+
+from common.common import Timestamp
+from common.http_client import get_client
+from common.state import get_backend
+from speedrunapi.speedrunapi import cache_player_names, fetch_player_names, leaderboard_url, player_name
+
+WATCH_INTERVAL = 300
+# only the top of each board is watched, which keeps every poll to a few kilobytes
+WATCH_TOP = 10
+SUBSCRIPTIONS_NAMESPACE = 'leaderboard_subscriptions'
+SNAPSHOTS_NAMESPACE = 'leaderboard_snapshots'
+
+
+def player_key(player):
+    # a short string standing for the runner in stored snapshots
+    return 'guest:' + player['name'] if player.get('rel') == 'guest' else player['id']
+
+
+def key_name(key):
+    if key.startswith('guest:'):
+        return key[len('guest:'):]
+    return player_name({'id': key})
+
+
+def diff_runs(name, old_runs, new_runs):
+    # old_runs and new_runs are [place, player key, milliseconds] rows; returns the announcements, best first.
+    # a slower time means a run was rejected or removed, which isn't announced, but whoever is left at #1 is
+    old_by_player = {player: (place, ms) for place, player, ms in old_runs}
+    changes = []
+    old_record = old_runs[0] if old_runs and old_runs[0][0] == 1 else None
+    for place, player, ms in new_runs:
+        old_place, old_ms = old_by_player.get(player, (None, None))
+        time = Timestamp.from_milliseconds(ms)
+        if place == 1 and (old_record is None or ms < old_record[2]):
+            message = "New world record in {}! {} got {}".format(name, key_name(player), time)
+            if old_record is not None and old_record[1] == player:
+                message += ", improving on their own {}".format(Timestamp.from_milliseconds(old_record[2]))
+            elif old_record is not None:
+                message += ", beating {}'s {}".format(key_name(old_record[1]), Timestamp.from_milliseconds(old_record[2]))
+            changes.append(message + '.')
+        elif place == 1 and old_record[1] != player:
+            changes.append("{} is now rank 1 in {} with {}.".format(key_name(player), name, time))
+        elif old_place is None:
+            changes.append("{} entered the {} top {} at rank {} with {}.".format(key_name(player), name, WATCH_TOP, place, time))
+        elif ms >= old_ms:
+            continue
+        elif old_place != place:
+            changes.append("{} improved their {} time to {}, moving from rank {} to {}.".format(
+                key_name(player), name, time, old_place, place))
+        else:
+            changes.append("{} improved their {} time to {}, still rank {}.".format(key_name(player), name, time, place))
+    return changes
+
+
+class LeaderboardWatcher:  # polls the subscribed leaderboards and reports what changed since the last poll
+    def __init__(self, interval=WATCH_INTERVAL, top=WATCH_TOP):
+        self._interval = interval
+        self._top = top
+        self._task = None
+        self.polls = 0
+        self.not_modified = 0
+        self.unchanged = 0
+
+    # subscriptions live in the state backend, so every shard sees them, keyed by leaderboard key
+    def subscribe(self, channel_id, key, name, game_id, category):
+        subscription = get_backend().get(SUBSCRIPTIONS_NAMESPACE, key) or \
+            {'name': name, 'game_id': game_id, 'category': category, 'channels': []}
+        if channel_id in subscription['channels']:
+            return False
+        subscription['channels'] = subscription['channels'] + [channel_id]
+        get_backend().set(SUBSCRIPTIONS_NAMESPACE, key, subscription)
+        return True
+
+    def unsubscribe(self, channel_id, key):
+        subscription = get_backend().get(SUBSCRIPTIONS_NAMESPACE, key)
+        if subscription is None or channel_id not in subscription['channels']:
+            return False
+        channels = [channel for channel in subscription['channels'] if channel != channel_id]
+        if channels:
+            get_backend().set(SUBSCRIPTIONS_NAMESPACE, key, dict(subscription, channels=channels))
+        else:
+            get_backend().delete(SUBSCRIPTIONS_NAMESPACE, key)
+            get_backend().delete(SNAPSHOTS_NAMESPACE, key)
+        return True
+
+    def subscriptions(self, channel_id):
+        return sorted(subscription['name'] for _, subscription in get_backend().items(SUBSCRIPTIONS_NAMESPACE)
+                      if subscription and channel_id in subscription['channels'])
+
+    async def run(self, post):
+        # post(channel_id, text) delivers an announcement
+        if self._task is not None:
+            return
+        self._task = asyncio.current_task()
+        while True:
+            await self.poll(post)
+            await asyncio.sleep(self._interval)
+
+    async def poll(self, post):
+        for key, subscription in get_backend().items(SUBSCRIPTIONS_NAMESPACE):
+            if not subscription:
+                continue
+            try:
+                changes = await self.check(key, subscription)
+            except Exception as e:
+                print("Leaderboard watch for {} failed: {!r}".format(subscription['name'], e))
+                continue
+            for change in changes:
+                for channel_id in subscription['channels']:
+                    post(channel_id, change)
+
+    async def check(self, key, subscription):
+        snapshot = get_backend().get(SNAPSHOTS_NAMESPACE, key)
+        params = dict(subscription['category'][1], top=self._top)
+        headers = {}
+        if snapshot is None:
+            # the first fetch brings every runner's name along; later ones only look up newcomers
+            params['embed'] = 'players'
+        else:
+            if snapshot.get('etag'):
+                headers['If-None-Match'] = snapshot['etag']
+            if snapshot.get('last_modified'):
+                headers['If-Modified-Since'] = snapshot['last_modified']
+        self.polls += 1
+        res = await get_client().get(leaderboard_url(subscription['game_id'], subscription['category']),
+                                     params=params, headers=headers)
+        if res.status == 304:
+            self.not_modified += 1
+            return []
+        # without validators from the server, an unchanged body is still spotted before any json parsing
+        digest = hashlib.blake2b(res.text.encode(), digest_size=8).hexdigest()
+        if snapshot is not None and snapshot['digest'] == digest:
+            self.unchanged += 1
+            return []
+        data = res.json()['data']
+        if 'players' in data:
+            cache_player_names(data['players']['data'])
+        runs = [[r['place'], player_key(r['run']['players'][0]), int(round(r['run']['times']['primary_t'] * 1000))]
+                for r in data['runs']]
+        response_headers = {name.lower(): value for name, value in res.headers.items()}
+        get_backend().set(SNAPSHOTS_NAMESPACE, key, {'etag': response_headers.get('etag'),
+                                                     'last_modified': response_headers.get('last-modified'),
+                                                     'digest': digest, 'runs': runs})
+        if snapshot is None:
+            return []
+        old_players = {player for _, player, _ in snapshot['runs']}
+        await fetch_player_names(player for _, player, _ in runs
+                                 if player not in old_players and not player.startswith('guest:'))
+        return diff_runs(subscription['name'], snapshot['runs'], runs)
+
+    def metrics(self):
+        return {'polls': self.polls, 'not_modified': self.not_modified, 'unchanged': self.unchanged}
@@ -1,14 +1,257 @@
-import srcomapi
-import srcomapi.datatypes as dt
-from difflib import SequenceMatcher
+import asyncio
+import re
+import time
+from itertools import islice, product
+from sys import intern
+from urllib.parse import urlencode
 
-api = srcomapi.SpeedrunCom()
-api.debug = 1
-game = api.search(srcomapi.datatypes.Game, {"name": "azure dreams"})[0]
+from common.http_client import HttpError, get_client
+from common.state import get_backend
+from speedrunapi.category_index import CategoryIndex
+from speedrunapi.ttl_cache import TTLCache
 
+API_URL = "https://www.speedrun.com/api/v1/"
+# the game a query is looked up in unless it starts with another game's abbreviation, e.g. "!leaderboard ad2 any%"
+GAME_NAME = "azure dreams"
+# abbreviations of other games to load at start up; any other abbreviation is loaded the first time it's asked for
+GAMES = ()
 
-def fetch_leaderboard(query):
-    best_guess = max(game.categories, key=lambda cat: SequenceMatcher(None, query.lower(), cat.name.lower()).ratio())
-    yield best_guess.name
-    for r in dt.Leaderboard(api, data=api.get("leaderboards/{}/category/{}?embed=variables".format(game.id, best_guess.id))).runs:
-        yield r['place'], r['run'].players[0].name, r['run'].times['primary_t']
+# game metadata rarely changes, so a stored snapshot is served for a long time while it refreshes in the background
+GAME_TTL = 24 * 3600
+GAME_MAX_STALE = 365 * 24 * 3600
+# how long an abbreviation speedrun.com doesn't know is remembered, so it isn't asked about on every query
+UNKNOWN_GAME_TTL = 24 * 3600
+# leaderboards are refreshed in the background once older than their ttl (seconds), keyed by category name
+LEADERBOARD_TTL = 300
+LEADERBOARD_TTLS = {}
+LEADERBOARD_MAX_STALE = 3600
+# extra names a category can be asked for by, keyed by category name
+CATEGORY_ALIASES = {}
+# below this score, or when the runner-up is within the margin, the bot asks "did you mean...?" instead of guessing
+MIN_CONFIDENCE = 0.5
+AMBIGUITY_MARGIN = 0.1
+PLAYER_NAME_TTL = 7 * 24 * 3600
+ABBREVIATION_PATTERN = re.compile(r'^[a-z0-9_-]+$')
+
+# the caches live in the state backend, so with a SqliteBackend they survive restarts and are shared by shards
+game_cache = TTLCache('speedrun_game_metadata', GAME_TTL, GAME_MAX_STALE)
+leaderboard_cache = TTLCache('speedrun_leaderboards', LEADERBOARD_TTL, LEADERBOARD_MAX_STALE)
+player_cache = TTLCache('speedrun_players', PLAYER_NAME_TTL, PLAYER_NAME_TTL)
+# abbreviation -> when speedrun.com said there is no such game
+UNKNOWN_GAMES_NAMESPACE = 'speedrun_unknown_games'
+
+
+class CategoryNotFoundError(Exception):
+    def __init__(self, query, candidates):
+        super().__init__(query)
+        self.query = query
+        self.candidates = candidates
+
+
+class GameEntry:  # one game's ids and its category index, with repeated names and ids interned
+    __slots__ = ('id', 'name', 'abbreviation', 'index', 'metadata')
+
+    def __init__(self, metadata):
+        self.id = intern(metadata['id'])
+        self.name = intern(metadata['name'])
+        self.abbreviation = intern(metadata['abbreviation'].lower())
+        self.metadata = metadata
+        self.index = CategoryIndex()
+        for category in metadata['categories']:
+            if category['type'] == 'per-game':
+                self._add(category['name'], category, None)
+            else:
+                for level in metadata['levels']:
+                    self._add('{} - {}'.format(level['name'], category['name']), category, level['id'])
+
+    def _add(self, name, category, level_id):
+        category_id = intern(category['id'])
+        level_id = intern(level_id) if level_id else None
+        self.index.add(intern(name), (category_id, {}, level_id), CATEGORY_ALIASES.get(name, ()))
+        # every combination of subcategory values gets its own entry, e.g. "Any% - No Warp"
+        variables = [variable for variable in category['variables'] if _applies(variable, level_id)]
+        if not variables:
+            return
+        for values in product(*(variable['values'] for variable in variables)):
+            value_name = ' - '.join([name] + [label for _, label in values])
+            params = {intern('var-' + variable['id']): intern(value_id) for variable, (value_id, _) in zip(variables, values)}
+            self.index.add(intern(value_name), (category_id, params, level_id), CATEGORY_ALIASES.get(value_name, ()))
+
+
+class GameRegistry:  # the games queries can be looked up in, by abbreviation, each indexed once per metadata refresh
+    def __init__(self):
+        self._entries = {}  # abbreviation -> GameEntry
+        self._default = None  # abbreviation of the GAME_NAME game, which is cached under its name
+
+    async def default(self):
+        entry = self._entry(await game_cache.get(GAME_NAME, lambda: _download_game_by_name(GAME_NAME)))
+        self._default = entry.abbreviation
+        return entry
+
+    async def get(self, abbreviation):
+        # None when there is no such game
+        abbreviation = abbreviation.lower()
+        if abbreviation == self._default:
+            return await self.default()
+        if game_cache.peek(abbreviation) is not None:
+            return self._entry(await game_cache.get(abbreviation, lambda: _download_game(abbreviation)))
+        # the first lookup goes straight to speedrun.com, so that "no such game" isn't reported as a failed refresh;
+        # the answer is kept in the state backend, so every shard remembers it
+        if time.time() - (get_backend().get(UNKNOWN_GAMES_NAMESPACE, abbreviation) or float('-inf')) < UNKNOWN_GAME_TTL:
+            return None
+        try:
+            metadata = await _download_game(abbreviation)
+        except HttpError as e:
+            if e.status != 404:
+                raise
+            get_backend().set(UNKNOWN_GAMES_NAMESPACE, abbreviation, time.time())
+            return None
+        game_cache.put(abbreviation, metadata)
+        return self._entry(metadata)
+
+    def _entry(self, metadata):
+        # a refreshed snapshot is a new object, and only then is the game indexed again
+        entry = self._entries.get(metadata['abbreviation'].lower())
+        if entry is None or entry.metadata is not metadata:
+            entry = GameEntry(metadata)
+            self._entries[entry.abbreviation] = entry
+        return entry
+
+
+games = GameRegistry()
+
+
+async def get_game():
+    return await games.default()
+
+
+async def warm_up():
+    results = await asyncio.gather(games.default(), *(games.get(abbreviation) for abbreviation in GAMES),
+                                   return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print("Could not load speedrun.com metadata: {!r}".format(result))
+
+
+async def find_category(query):
+    # (game, category name, (category id, subcategory variables, level id or None)) for the best match;
+    # names in games other than the default one are prefixed with the game's name
+    game = await get_game()
+    candidates = game.index.search(query)
+    words = query.split(None, 1)
+    if (candidates and candidates[0][0] == 1.0) or len(words) < 2 or not ABBREVIATION_PATTERN.match(words[0].lower()):
+        return _best_match(game, query, candidates)
+    # otherwise a first word naming a game, e.g. "ad2 any%", picks the game to look in
+    try:
+        other_game = await games.get(words[0])
+    except HttpError as e:
+        print("Could not look up game {}: {!r}".format(words[0], e))
+        other_game = None
+    if other_game is None:
+        return _best_match(game, query, candidates)
+    other_candidates = other_game.index.search(words[1])
+    # a good match here isn't given up for a poor one in a game whose abbreviation happens to be the first word
+    if _is_confident(candidates) and not _is_confident(other_candidates):
+        return _best_match(game, query, candidates)
+    return _best_match(other_game, words[1], other_candidates, qualify=other_game is not game)
+
+
+def _best_match(game, query, candidates, qualify=False):
+    if not _is_confident(candidates):
+        raise CategoryNotFoundError(query, [name for _, name, _ in candidates[:3]])
+    _, name, category = candidates[0]
+    return game, '{} {}'.format(game.name, name) if qualify else name, category
+
+
+def leaderboard_key(category):
+    category_id, variables, level_id = category
+    key = level_id + '/' + category_id if level_id else category_id
+    return key + ('?' + urlencode(sorted(variables.items())) if variables else '')
+
+
+def leaderboard_url(game_id, category):
+    category_id, _, level_id = category
+    if level_id:
+        return API_URL + "leaderboards/{}/level/{}/{}".format(game_id, level_id, category_id)
+    return API_URL + "leaderboards/{}/category/{}".format(game_id, category_id)
+
+
+async def fetch_leaderboard(query, start=0, stop=None):
+    # yields the category name, then (place, name, seconds) for runs start to stop; the whole board is cached,
+    # so asking for another slice of it soon after doesn't download it again
+    game, name, category = await find_category(query)
+    yield name
+    ttl = LEADERBOARD_TTLS.get(name, LEADERBOARD_TTL)
+    rows = await leaderboard_cache.get(leaderboard_key(category), lambda: _download_leaderboard(game.id, category), ttl)
+    for row in islice(rows, start, stop):
+        yield tuple(row)
+
+
+def _is_confident(candidates):
+    if not candidates:
+        return False
+    best_score = candidates[0][0]
+    if best_score == 1.0:
+        return True
+    runner_up_score = candidates[1][0] if len(candidates) > 1 else 0.0
+    return best_score >= MIN_CONFIDENCE and best_score - runner_up_score >= AMBIGUITY_MARGIN
+
+
+def _applies(variable, level_id):
+    # whether a subcategory variable splits the full-game board (level_id None) or the given level's boards
+    scope = variable['scope']
+    if level_id is None:
+        return scope in ('global', 'full-game')
+    return scope in ('global', 'all-levels') or (scope == 'single-level' and variable['level'] == level_id)
+
+
+async def _download_game_by_name(name):
+    res = await get_client().get(API_URL + "games", params={'name': name, 'embed': 'categories.variables,levels'})
+    return _game_metadata(res.json()['data'][0])
+
+
+async def _download_game(abbreviation):
+    res = await get_client().get(API_URL + "games/" + abbreviation, params={'embed': 'categories.variables,levels'})
+    return _game_metadata(res.json()['data'])
+
+
+def _game_metadata(data):
+    categories = [{'id': cat['id'], 'name': cat['name'], 'type': cat['type'], 'variables': _subcategory_variables(cat)}
+                  for cat in data['categories']['data']]
+    levels = [{'id': level['id'], 'name': level['name']} for level in data['levels']['data']]
+    return {'id': data['id'], 'name': data['names']['international'], 'abbreviation': data['abbreviation'],
+            'categories': categories, 'levels': levels}
+
+
+def _subcategory_variables(category):
+    return [{'id': var['id'], 'scope': var['scope']['type'], 'level': var['scope'].get('level'),
+             'values': [(value_id, value['label']) for value_id, value in var['values']['values'].items()]}
+            for var in category['variables']['data'] if var.get('is-subcategory')]
+
+
+async def _download_leaderboard(game_id, category):
+    # embedding players resolves every runner's name in the same request
+    params = dict(category[1], embed='variables,players')
+    res = await get_client().get(leaderboard_url(game_id, category), params=params)
+    data = res.json()['data']
+    cache_player_names(data['players']['data'])
+    return [(r['place'], player_name(r['run']['players'][0]), r['run']['times']['primary_t']) for r in data['runs']]
+
+
+def cache_player_names(players):
+    player_cache.put_many((player['id'], player['names']['international'])
+                          for player in players if player.get('rel') != 'guest')
+
+
+async def fetch_player_names(player_ids):
+    # looks up the runners we haven't seen yet, one request each, so only worth it for a handful
+    missing = [player_id for player_id in set(player_ids) if player_cache.peek(player_id) is None]
+    responses = await asyncio.gather(*(get_client().get(API_URL + "users/" + player_id) for player_id in missing),
+                                     return_exceptions=True)
+    cache_player_names(res.json()['data'] for res in responses if not isinstance(res, Exception))
+
+
+def player_name(player):
+    if player.get('rel') == 'guest':
+        return player['name']
+    return player_cache.peek(player['id']) or player['id']
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from common.state import get_backend
+
+
+class TTLCache:
+    def __init__(self, namespace, default_ttl, max_stale):
+        # entries older than their ttl are served stale while a background refresh runs,
+        # until they are more than max_stale past it, at which point callers wait for fresh data
+        self._namespace = namespace
+        self._default_ttl = default_ttl
+        self._max_stale = max_stale
+        self._pending = {}  # key -> refresh task
+
+    async def get(self, key, fetch, ttl=None):
+        ttl = self._default_ttl if ttl is None else ttl
+        entry = get_backend().get(self._namespace, key)
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.time() - fetched_at
+            if age < ttl:
+                return value
+            if age < ttl + self._max_stale:
+                self._refresh(key, fetch)
+                return value
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def peek(self, key):
+        entry = get_backend().get(self._namespace, key)
+        return entry[1] if entry is not None else None
+
+    def put(self, key, value):
+        get_backend().set(self._namespace, key, (time.time(), value))
+
+    def put_many(self, items):
+        now = time.time()
+        get_backend().set_many(self._namespace, [(key, (now, value)) for key, value in items])
+
+    def _refresh(self, key, fetch):
+        if key not in self._pending:
+            task = asyncio.ensure_future(self._load_entry(key, fetch))
+            self._pending[key] = task
+            task.add_done_callback(lambda finished: self._refreshed(key, finished))
+        return self._pending[key]
+
+    async def _load_entry(self, key, fetch):
+        value = await fetch()
+        self.put(key, value)
+        return value
+
+    def _refreshed(self, key, task):
+        self._pending.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            print("Cache refresh for {} failed: {!r}".format(key, task.exception()))
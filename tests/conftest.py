@@ -0,0 +1,13 @@
+# Run from the repository root with: python -m pytest
+import pytest
+
+import discord_tools.outbound
+from discord_tools.outbound import Outbox
+
+
+@pytest.fixture
+def outbox(monkeypatch):
+    # replies are still queued and merged, just not held back by discord's rate limits
+    unlimited = Outbox(channel_rate=10 ** 6, global_rate=10 ** 6)
+    monkeypatch.setattr(discord_tools.outbound, 'outbox', unlimited)
+    return unlimited
@@ -0,0 +1,35 @@
+import asyncio
+
+import discord_tools.plugins
+from ad_rando.seed_generator import AdrandoCommandHandler
+from ad_rando.seed_store import SeedStore
+from cogs.adrando import Adrando
+from discord_tools.discord_formatting import MESSAGE_LIMIT
+from discord_tools.fakes import FakeContext, FakeMessage
+
+
+class FakeBot:
+    worker = (0, 1)
+
+
+def test_long_history_is_split_to_fit_discord(tmp_path, monkeypatch, outbox):
+    # a fresh feature registry, so the cog's modules aren't reloaded for other tests
+    monkeypatch.setattr(discord_tools.plugins, 'features', {})
+    store = SeedStore(str(tmp_path / 'seeds.db'))
+    links = ['https://adrando.com/?dE:-2,fh:1,iInS:0,txX,,{}'.format(1700000000123 - n) for n in range(35)]
+    for n in range(5):
+        store.save(1, 1, 'randomtoolkit', links[n * 7:(n + 1) * 7], created_at=1700000000 + n)
+    monkeypatch.setattr(AdrandoCommandHandler, '_default_seed_store', store)
+    cog = Adrando(FakeBot())
+    monkeypatch.setattr(cog, 'seed_pools', lambda: None)
+    ctx = FakeContext(FakeMessage('!adrando history'))
+
+    async def run():
+        await Adrando.adrando.callback(cog, ctx, 'history')
+        await asyncio.wait_for(outbox.send(ctx.channel, 'flush'), 1)
+
+    asyncio.run(run())
+    messages = ctx.channel.messages
+    assert len(messages) > 1
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
+    assert all(link in ''.join(messages) for link in links)
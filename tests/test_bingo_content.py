@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+import bingo.bingo_content
+from bingo.bingo_content import BingoContentError, ContentFile, parse_card_set
+
+
+def goals(count, **extra):
+    return [dict({'name': 'Goal {}'.format(n)}, **extra) for n in range(count)]
+
+
+def write(path, content, mtime):
+    path.write_text(content)
+    # set explicitly, since two writes in the same second can share an mtime
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def always_check(monkeypatch):
+    monkeypatch.setattr(bingo.bingo_content, 'RELOAD_CHECK_INTERVAL', 0)
+
+
+def test_goals_keep_all_their_fields():
+    card_set = parse_card_set(json.dumps(goals(25, tier=3, types=['item'])), 'cards.json')
+    assert card_set.goals[0] == {'name': 'Goal 0', 'tier': 3, 'types': ['item']}
+    assert json.loads(card_set.payload)[0]['tier'] == 3
+
+
+def test_a_bad_edit_keeps_the_last_good_cards(tmp_path, always_check, capsys):
+    path = tmp_path / 'cards.json'
+    write(path, json.dumps(goals(25)), 1000)
+    cards = ContentFile(str(path), parse_card_set)
+    good = cards.get()
+    write(path, '[{"name": ', 2000)
+    assert cards.get() is good
+    assert cards.get() is good
+    # reported once, not on every check
+    assert capsys.readouterr().out.count('Still using the last good') == 1
+    write(path, json.dumps(goals(30)), 3000)
+    assert len(cards.get().goals) == 30
+
+
+def test_a_deleted_file_keeps_the_last_good_cards(tmp_path, always_check):
+    path = tmp_path / 'cards.json'
+    write(path, json.dumps(goals(25)), 1000)
+    cards = ContentFile(str(path), parse_card_set)
+    good = cards.get()
+    path.unlink()
+    assert cards.get() is good
+
+
+def test_a_file_that_never_loaded_raises(tmp_path, always_check):
+    path = tmp_path / 'cards.json'
+    write(path, json.dumps(goals(3)), 1000)
+    cards = ContentFile(str(path), parse_card_set)
+    with pytest.raises(BingoContentError):
+        cards.get()
+    with pytest.raises(BingoContentError):
+        cards.get()
+    path.unlink()
+    with pytest.raises(BingoContentError):
+        cards.get()
@@ -0,0 +1,55 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bingo.bingosync import BingosyncClient
+from common.http_client import HttpClient
+
+
+def run_against(app, test):
+    async def run():
+        server = TestServer(app, host='127.0.0.1')
+        await server.start_server()
+        http = HttpClient(retries=0)
+        try:
+            return await test(BingosyncClient(str(server.make_url('/')), http))
+        finally:
+            await http.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def rooms(count):
+    return [('Room {}'.format(n + 1), 'pass', '[]') for n in range(count)]
+
+
+def test_rooms_are_none_when_bingosync_is_down(capsys):
+    async def down(request):
+        return web.Response(status=503)
+
+    app = web.Application()
+    app.router.add_route('*', '/', down)
+    assert run_against(app, lambda client: client.create_rooms(rooms(4))) == [None] * 4
+    assert 'Could not reach bingosync' in capsys.readouterr().out
+
+
+def test_each_failed_room_is_logged(capsys):
+    async def form(request):
+        response = web.Response(text='form')
+        response.set_cookie('csrftoken', 'token')
+        return response
+
+    async def create(request):
+        data = await request.post()
+        if data['room_name'] == 'Room 2':
+            return web.Response(status=500)
+        return web.Response(text='<a href="/room/{}/disconnect">'.format(data['room_name'].replace(' ', '')))
+
+    app = web.Application()
+    app.router.add_get('/', form)
+    app.router.add_post('/', create)
+    urls = run_against(app, lambda client: client.create_rooms(rooms(3)))
+    assert urls[0].endswith('/room/Room1') and urls[1] is None and urls[2].endswith('/room/Room3')
+    assert 'Could not create bingo room Room 2' in capsys.readouterr().out
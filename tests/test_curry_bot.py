@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from nextcord.ext.commands import CommandOnCooldown
+
+import curry_bot
+from common.metrics import metrics
+from discord_tools.fakes import FakeAuthor, FakeContext, FakeMessage
+
+
+def test_on_error_prints_the_traceback_and_stays_online(monkeypatch, capsys):
+    async def run():
+        bot = curry_bot.create_bot()
+
+        async def change_presence(**kwargs):
+            raise AssertionError("on_error changed the bot's presence")
+
+        monkeypatch.setattr(bot, 'change_presence', change_presence)
+        try:
+            raise ValueError('handler broke')
+        except ValueError:
+            await curry_bot.on_error('on_message')
+
+    before = metrics.counters('event_errors_total').get((('event', 'on_message'),), 0)
+    asyncio.run(run())
+    captured = capsys.readouterr()
+    output = captured.out + captured.err
+    assert 'Ignoring exception in on_message' in output
+    assert "ValueError: handler broke" in output
+    assert metrics.counters('event_errors_total')[(('event', 'on_message'),)] == before + 1
+
+
+def help_context(bot, user_id):
+    message = FakeMessage('!help', author=FakeAuthor(user_id))
+    ctx = FakeContext(message)
+    ctx.bot = bot
+    ctx.command = None
+    ctx.cog = None
+    return ctx
+
+
+def test_help_lists_every_command_without_using_up_the_user_bucket():
+    async def run():
+        bot = curry_bot.create_bot()
+        # the owner sees the owner-only commands too, without asking discord who the owner is
+        bot.owner_id = 4242
+        ctx = help_context(bot, 4242)
+        help_command = bot.help_command
+        help_command.context = ctx
+        listed = await help_command.filter_commands(bot.commands)
+        return {command.name for command in listed}, {command.name for command in bot.commands}, ctx
+
+    listed, every, ctx = asyncio.run(run())
+    assert listed == every
+    assert curry_bot.user_cooldowns.get_bucket(ctx.message).get_tokens() == curry_bot.USER_COMMAND_RATE
+
+
+def test_invocations_are_still_throttled_per_user():
+    async def run():
+        bot = curry_bot.create_bot()
+        ctx = help_context(bot, 4343)
+        for _ in range(curry_bot.USER_COMMAND_RATE):
+            assert await bot.can_run(ctx, call_once=True)
+        with pytest.raises(CommandOnCooldown):
+            await bot.can_run(ctx, call_once=True)
+
+    asyncio.run(run())
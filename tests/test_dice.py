@@ -0,0 +1,47 @@
+import time
+
+import pytest
+
+from randomwrapper.dice import DiceError, compile_expression
+
+
+def test_two_d6():
+    distribution = compile_expression('2d6').distribution()
+    assert distribution.offset == 2
+    assert distribution.counts == [1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1]
+    assert distribution.total == 36
+
+
+def test_keep_highest_matches_brute_force():
+    distribution = compile_expression('4d6kh3').distribution()
+    counts = {}
+    for a in range(1, 7):
+        for b in range(1, 7):
+            for c in range(1, 7):
+                for d in range(1, 7):
+                    total = sum(sorted((a, b, c, d))[1:])
+                    counts[total] = counts.get(total, 0) + 1
+    assert distribution.probabilities() == [(total, counts[total] / 6 ** 4) for total in range(3, 19)]
+
+
+@pytest.mark.parametrize('text', ['1000d20', '447d100', '100d1000', '50d6!', '100d20+100d20+100d20'])
+def test_stats_that_would_take_seconds_are_refused_straight_away(text):
+    start = time.perf_counter()
+    with pytest.raises(DiceError):
+        compile_expression(text).distribution()
+    assert time.perf_counter() - start < 0.1
+
+
+@pytest.mark.parametrize('text', ['300d20', '40d20kh20', '10d10!', '200d6+200d6'])
+def test_stats_within_the_budget_are_worked_out(text):
+    start = time.perf_counter()
+    compile_expression(text).distribution()
+    # the budget is about a second; slow test machines get some slack
+    assert time.perf_counter() - start < 3
+
+
+@pytest.mark.parametrize('text', ['d6+' * 2000 + 'd6', '10d6+' * 500 + '3'])
+def test_long_rolls_are_summarised(text):
+    total, detail = compile_expression(text).roll(lambda count, sides: [1] * count)
+    assert total > 2000
+    assert detail.startswith('(') and len(detail) < 100
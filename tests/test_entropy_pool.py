@@ -0,0 +1,36 @@
+import os
+
+from randomwrapper.entropy_pool import EntropyPool
+
+
+def filled_pool(size):
+    pool = EntropyPool(None, low_water=0, high_water=size, batch_size=size)
+    pool._ring.extend(os.urandom(size))
+    return pool
+
+
+def test_values_are_in_range():
+    pool = filled_pool(4096)
+    values = pool.randbelow_many(500, 6)
+    assert len(values) == 500
+    assert set(values) <= set(range(6))
+    assert all(0 <= value < 1000 for value in pool.randbelow_many(100, 1000))
+
+
+def test_a_pool_too_big_for_the_ring_leaves_it_untouched():
+    pool = filled_pool(4096)
+    assert pool.randbelow_many(5000, 6) is None
+    assert len(pool._ring) == 4096
+    # 2100 two-byte draws need over 4200 bytes
+    assert pool.randbelow_many(2100, 1000) is None
+    assert len(pool._ring) == 4096
+    # smaller rolls are still served from it
+    assert pool.dice(3, 6) is not None
+    assert pool.hits == 1
+
+
+def test_dice_fall_back_without_draining_the_pool():
+    pool = filled_pool(4096)
+    assert pool.dice(5000, 6) is None
+    assert pool.fallbacks == 1
+    assert len(pool._ring) == 4096
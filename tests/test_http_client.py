@@ -0,0 +1,153 @@
+import asyncio
+import time
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from common.http_client import HttpClient, HttpError
+from common.metrics import metrics
+
+HOST = '127.0.0.1'
+
+
+class StubServer:  # a local stand-in service that fails the first few requests and tracks how many overlap
+    def __init__(self, failures=0, status=503, latency=0.0):
+        self.failures = failures
+        self.status = status
+        self.latency = latency
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.requests <= self.failures:
+                return web.Response(status=self.status, text='try again')
+            return web.json_response({'ok': True, 'n': self.requests})
+        finally:
+            self.in_flight -= 1
+
+
+def serve(stub, test):
+    # runs test(client, url) against a local server answering every path with stub.handle
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', stub.handle)
+        server = TestServer(app, host=HOST)
+        await server.start_server()
+        client = HttpClient(backoff=0.001, host_concurrency={HOST: 2})
+        try:
+            return await test(client, str(server.make_url('/stub')))
+        finally:
+            await client.close()
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def counter(name):
+    return metrics.counters(name).get((('integration', HOST),), 0)
+
+
+def test_get_retries_until_it_succeeds():
+    stub = StubServer(failures=2)
+    retries = counter('http_retries_total')
+    response = serve(stub, lambda client, url: client.get(url))
+    assert response.status == 200
+    assert response.json() == {'ok': True, 'n': 3}
+    assert stub.requests == 3
+    assert counter('http_retries_total') - retries == 2
+
+
+def test_gives_up_after_the_retries_and_counts_the_error():
+    stub = StubServer(failures=10)
+    errors = counter('http_errors_total')
+
+    async def test(client, url):
+        try:
+            await client.get(url)
+        except HttpError as e:
+            return e
+        return None
+
+    error = serve(stub, test)
+    assert error is not None and error.status == 503
+    assert stub.requests == 3  # the first attempt and two retries
+    assert counter('http_errors_total') - errors == 1
+
+
+def test_post_is_not_retried():
+    stub = StubServer(failures=1)
+
+    async def test(client, url):
+        try:
+            await client.post(url, data={'a': 1})
+        except HttpError as e:
+            return e.status
+        return None
+
+    assert serve(stub, test) == 503
+    assert stub.requests == 1
+
+
+def test_client_errors_are_not_retried():
+    stub = StubServer(failures=1, status=404)
+
+    async def test(client, url):
+        try:
+            await client.get(url)
+        except HttpError as e:
+            return e.status
+        return None
+
+    assert serve(stub, test) == 404
+    assert stub.requests == 1
+
+
+def test_requests_to_one_host_respect_its_concurrency_limit():
+    stub = StubServer(latency=0.05)
+    requests = counter('http_requests_total')
+
+    async def test(client, url):
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.get(url) for _ in range(8)))
+        return responses, time.perf_counter() - start
+
+    responses, elapsed = serve(stub, test)
+    assert all(response.status == 200 for response in responses)
+    assert stub.max_in_flight == 2
+    # eight requests two at a time take four rounds, not eight and not one
+    assert 0.2 <= elapsed < 0.4
+    assert counter('http_requests_total') - requests == 8
+    calls = [calls for integration, calls, _, _, _ in metrics.latency_summary('http_request_seconds', 'integration')
+             if integration == HOST]
+    assert calls and calls[0] >= 8
+
+
+def test_slow_requests_run_in_parallel_without_blocking_the_loop():
+    stub = StubServer(latency=0.2)
+
+    async def test(client, url):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        start = time.perf_counter()
+        await asyncio.gather(client.get(url), client.get(url))
+        elapsed = time.perf_counter() - start
+        ticker.cancel()
+        return elapsed, ticks
+
+    elapsed, ticks = serve(stub, test)
+    assert elapsed < 0.35
+    # the event loop kept running other work while both requests waited
+    assert ticks >= 10
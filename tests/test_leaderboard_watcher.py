@@ -0,0 +1,46 @@
+from speedrunapi.leaderboard_watcher import diff_runs
+
+# guest runners are named by their key, so nothing needs looking up
+BOARD = [[1, 'guest:a', 100000], [2, 'guest:b', 110000], [3, 'guest:c', 120000]]
+
+
+def test_nothing_changed():
+    assert diff_runs('Any%', BOARD, BOARD) == []
+
+
+def test_new_world_record_beating_someone_else():
+    new = [[1, 'guest:c', 95000], [2, 'guest:a', 100000], [3, 'guest:b', 110000]]
+    assert diff_runs('Any%', BOARD, new) == ["New world record in Any%! c got 1m 35s, beating a's 1m 40s."]
+
+
+def test_new_world_record_improving_their_own():
+    new = [[1, 'guest:a', 99000]] + BOARD[1:]
+    assert diff_runs('Any%', BOARD, new) == ["New world record in Any%! a got 1m 39s, improving on their own 1m 40s."]
+
+
+def test_improvements_and_new_entries():
+    new = [[1, 'guest:a', 100000], [2, 'guest:c', 105000], [3, 'guest:b', 109000], [4, 'guest:d', 130000]]
+    assert diff_runs('Any%', BOARD, new) == [
+        "c improved their Any% time to 1m 45s, moving from rank 3 to 2.",
+        "b improved their Any% time to 1m 49s, moving from rank 2 to 3.",
+        "d entered the Any% top 10 at rank 4 with 2m 10s.",
+    ]
+
+
+def test_a_rejected_record_announces_the_new_leader_only():
+    new = [[1, 'guest:b', 110000], [2, 'guest:a', 120000], [3, 'guest:c', 120000]]
+    assert diff_runs('Any%', BOARD, new) == ["b is now rank 1 in Any% with 1m 50s."]
+
+
+def test_a_slower_time_below_first_is_not_announced():
+    new = [[1, 'guest:a', 100000], [2, 'guest:c', 120000], [3, 'guest:b', 125000]]
+    assert diff_runs('Any%', BOARD, new) == []
+
+
+def test_first_run_on_an_empty_board_is_a_record():
+    assert diff_runs('Any%', [], [[1, 'guest:a', 100000]]) == ["New world record in Any%! a got 1m 40s."]
+
+
+def test_improving_without_moving():
+    new = [[1, 'guest:a', 100000], [2, 'guest:b', 108000], [3, 'guest:c', 120000]]
+    assert diff_runs('Any%', BOARD, new) == ["b improved their Any% time to 1m 48s, still rank 2."]
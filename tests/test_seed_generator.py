@@ -0,0 +1,104 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import ad_rando.seed_generator
+from ad_rando.seed_generator import AdrandoCommandHandler, NoRestrictionsSeedValidator, ManualRandomizerParams, \
+    PresetCatalogue, SeedGenerator, SeedsGenerator
+from ad_rando.seed_constraints import NO_HIKEWNE
+from ad_rando.seed_pool import SeedPool
+from ad_rando.seed_store import SeedStore
+
+
+def frozen_clock(monkeypatch):
+    # every generator starts from the same time, as two runs of the bot could after a restart
+    monkeypatch.setattr(ad_rando.seed_generator.time, 'time', lambda: 1700000000.123456)
+
+
+def test_seeds_already_in_the_store_are_not_handed_out_again(tmp_path, monkeypatch):
+    frozen_clock(monkeypatch)
+    store = SeedStore(str(tmp_path / 'seeds.db'))
+    params, validator = ManualRandomizerParams('abc'), NoRestrictionsSeedValidator()
+    first = SeedsGenerator(params, validator, 3, seed_store=store).generate()
+    store.save(1, 1, 'test', first)
+    second = SeedsGenerator(params, validator, 3, seed_store=store).generate()
+    assert len(second) == 3
+    assert not set(first) & set(second)
+    assert store.issued(first + second) == set(first)
+
+
+def test_a_new_pool_skips_seeds_handed_out_before_a_reload(tmp_path, monkeypatch):
+    frozen_clock(monkeypatch)
+    store = SeedStore(str(tmp_path / 'seeds.db'))
+    params, validator = ManualRandomizerParams('abc'), NoRestrictionsSeedValidator()
+    first = SeedsGenerator(params, validator, 2, SeedPool(validator, 2, 4), store).generate()
+    store.save(1, 1, 'test', first)
+    second = SeedsGenerator(params, validator, 2, SeedPool(validator, 2, 4), store).generate()
+    assert not set(first) & set(second)
+
+
+def test_each_worker_finds_its_own_seeds_when_the_offset_shares_a_factor(monkeypatch):
+    frozen_clock(monkeypatch)
+    assert SeedGenerator(NO_HIKEWNE)._offset % 2 == 0
+    with ThreadPoolExecutor(2) as executor:
+        takes = [executor.submit(SeedPool(NO_HIKEWNE, 1, 2, partition=(index, 2)).take, 5) for index in range(2)]
+        seeds = [take.result(timeout=10) for take in takes]
+    for index in range(2):
+        assert len(seeds[index]) == 5
+        assert all(seed % 2 == index and NO_HIKEWNE.validate(seed) for seed in seeds[index])
+
+
+def test_handler_saves_what_it_hands_out(tmp_path, monkeypatch):
+    frozen_clock(monkeypatch)
+    store = SeedStore(str(tmp_path / 'seeds.db'))
+    AdrandoCommandHandler(('riders', '2'), 1, 1, seed_store=store).handle()
+    AdrandoCommandHandler(('riders', '2'), 1, 2, seed_store=store).handle()
+    first, second = store.current(1, 1).links, store.current(1, 2).links
+    assert len(first) == len(second) == 2
+    assert not set(first) & set(second)
+
+
+def test_default_seed_store_is_closed_for_a_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(AdrandoCommandHandler, 'SEED_STORE_PATH', str(tmp_path / 'seeds.db'))
+    monkeypatch.setattr(AdrandoCommandHandler, '_default_seed_store', None)
+    store = AdrandoCommandHandler.default_seed_store()
+    AdrandoCommandHandler.close_default_seed_store()
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.current(1, 1)
+    assert AdrandoCommandHandler.default_seed_store() is not store
+    AdrandoCommandHandler.close_default_seed_store()
+
+
+def test_presets_file_is_loaded():
+    presets = PresetCatalogue.parse('[{"name": "Cup1", "description": "Cup round 1", "params": "dE:-2", '
+                                    '"category": "tournament", "tournament": "Cup"}]', 'presets.json')
+    assert [(preset.name, preset.params.params(), preset.tournament) for preset in presets] == [('cup1', 'dE:-2', 'Cup')]
+
+
+@pytest.mark.parametrize('entry', ['{"name": "cup1", "description": "d", "category": 3}',
+                                   '{"name": "cup1", "description": "d", "tournament": ["Cup"]}',
+                                   '{"name": "cup1", "description": "d", "params": {"dE": -2}}',
+                                   '{"name": "cup1", "description": "d", "validator": []}'])
+def test_presets_file_with_a_wrong_type_is_refused(entry):
+    with pytest.raises(ValueError, match=r'presets.json: \w+ of preset 2 \(cup1\) must be a string'):
+        PresetCatalogue.parse('[{"name": "ok", "description": "d"}, ' + entry + ']', 'presets.json')
+
+
+def test_presets_file_without_a_name_is_refused():
+    with pytest.raises(ValueError, match='preset 1 needs a name'):
+        PresetCatalogue.parse('[{"name": 7, "description": "d"}]', 'presets.json')
+
+
+def test_history_for_a_day(tmp_path):
+    store = SeedStore(str(tmp_path / 'seeds.db'))
+    race_day = 1706659200  # 2024-01-31 00:00 UTC
+    store.save(1, 1, 'race', ['https://adrando.com/?a,,1'], created_at=race_day + 20 * 3600)
+    store.save(1, 1, 'practice', ['https://adrando.com/?a,,2'], created_at=race_day + 24 * 3600)
+    store.save(1, 2, 'elsewhere', ['https://adrando.com/?a,,3'], created_at=race_day + 3600)
+    assert AdrandoCommandHandler(('history', '2024-01-31'), 1, 1, seed_store=store).handle() == \
+        ['race seeds from 2024-01-31 20:00 UTC:', 'Seed 1: <https://adrando.com/?a,,1>']
+    assert AdrandoCommandHandler(('history', '2024-01-30'), 1, 1, seed_store=store).handle() == \
+        ['No seeds were generated in this channel on 2024-01-30.']
+    assert AdrandoCommandHandler(('history', 'tuesday'), 1, 1, seed_store=store).handle() == \
+        ["I don't know the date tuesday. Dates look like 2024-01-31."]
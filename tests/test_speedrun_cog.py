@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+import discord_tools.plugins
+import speedrunapi.speedrunapi as speedrunapi
+from cogs.speedrun import Speedrun
+from common.http_client import HttpError
+from common.state import InProcessBackend, get_backend, set_backend
+from discord_tools.fakes import FakeContext, FakeMessage
+
+
+class FakeBot:
+    def __init__(self, ready):
+        self.ready = ready
+        self.worker = (0, 1)
+
+    def is_ready(self):
+        return self.ready
+
+
+def run_cog(monkeypatch, ready, events):
+    starts = []
+
+    async def start(self):
+        starts.append(self)
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(Speedrun, '_start', start)
+
+    async def run():
+        cog = Speedrun(FakeBot(ready))
+        for event in events:
+            await event(cog)
+        await asyncio.sleep(0)
+        tasks = list(cog._tasks)
+        cog.cog_unload()
+        await asyncio.sleep(0)
+        return tasks
+
+    tasks = asyncio.run(run())
+    assert all(task.cancelled() for task in tasks)
+    return starts
+
+
+def test_starts_on_ready_at_login(monkeypatch):
+    assert len(run_cog(monkeypatch, False, [])) == 0
+    assert len(run_cog(monkeypatch, False, [Speedrun.on_ready])) == 1
+
+
+def test_starts_straight_away_when_reloaded_while_connected(monkeypatch):
+    assert len(run_cog(monkeypatch, True, [])) == 1
+
+
+def test_a_reconnect_does_not_start_a_second_watcher(monkeypatch):
+    assert len(run_cog(monkeypatch, True, [Speedrun.on_ready, Speedrun.on_ready])) == 1
+
+
+@pytest.mark.parametrize('args', [('any%',), ('watch', 'any%')])
+def test_speedrun_com_being_down_gets_a_reply(monkeypatch, outbox, args):
+    # a cold start: nothing cached and every request failing
+    async def download(name):
+        raise HttpError(name, reason='down')
+
+    previous = get_backend()
+    set_backend(InProcessBackend())
+    monkeypatch.setattr(discord_tools.plugins, 'features', {})
+    monkeypatch.setattr(speedrunapi, '_download_game_by_name', download)
+    monkeypatch.setattr(speedrunapi, 'games', speedrunapi.GameRegistry())
+    cog = Speedrun(FakeBot(False))
+    ctx = FakeContext(FakeMessage('!leaderboard ' + ' '.join(args)))
+
+    async def run():
+        await Speedrun.leaderboard.callback(cog, ctx, *args)
+        await asyncio.wait_for(outbox.send(ctx.channel, 'flush'), 1)
+
+    try:
+        asyncio.run(run())
+    finally:
+        set_backend(previous)
+    assert "speedrun.com isn't answering" in ctx.channel.messages[0]
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+import speedrunapi.speedrunapi as speedrunapi
+from common.http_client import HttpError
+from common.state import InProcessBackend, get_backend, set_backend
+from speedrunapi.speedrunapi import CategoryNotFoundError, GameRegistry, find_category
+
+
+def metadata(game_id, name, abbreviation, categories):
+    return {'id': game_id, 'name': name, 'abbreviation': abbreviation, 'levels': [],
+            'categories': [{'id': category_id, 'name': category_name, 'type': 'per-game', 'variables': []}
+                           for category_id, category_name in categories]}
+
+
+AZURE_DREAMS = metadata('ad', 'Azure Dreams', 'azuredreams',
+                        [('any', 'Any%'), ('second', 'Second Tower'), ('hundred', '100%')])
+OTHER_GAMES = {
+    'ad2': metadata('ad2', 'Azure Dreams GBC', 'ad2', [('any2', 'Any%'), ('glitchless2', 'Glitchless')]),
+    'second': metadata('sec', 'Second', 'second', [('pacifist', 'Pacifist'), ('low', 'Low%')]),
+}
+
+
+@pytest.fixture
+def offline(monkeypatch):
+    # speedrun.com as far as the tests are concerned: AZURE_DREAMS plus OTHER_GAMES, every other game a 404
+    previous = get_backend()
+    set_backend(InProcessBackend())
+    lookups = []
+
+    async def download_game_by_name(name):
+        return AZURE_DREAMS
+
+    async def download_game(abbreviation):
+        lookups.append(abbreviation)
+        if abbreviation not in OTHER_GAMES:
+            raise HttpError(abbreviation, status=404)
+        return OTHER_GAMES[abbreviation]
+
+    monkeypatch.setattr(speedrunapi, '_download_game_by_name', download_game_by_name)
+    monkeypatch.setattr(speedrunapi, '_download_game', download_game)
+    monkeypatch.setattr(speedrunapi, 'games', GameRegistry())
+    yield lookups
+    set_backend(previous)
+
+
+def find(query):
+    game, name, category = asyncio.run(find_category(query))
+    return game.abbreviation, name
+
+
+def test_first_word_picks_another_game(offline):
+    assert find('ad2 glitchless') == ('ad2', 'Azure Dreams GBC Glitchless')
+
+
+def test_a_confident_match_survives_a_game_sharing_its_first_word(offline):
+    # "second" is a game too, but it has nothing like "towr"
+    assert find('second towr') == ('azuredreams', 'Second Tower')
+    assert offline == ['second']
+
+
+def test_unknown_games_are_looked_up_once_and_quietly(offline, capsys):
+    assert find('secnd towr') == ('azuredreams', 'Second Tower')
+    assert find('secnd towr') == ('azuredreams', 'Second Tower')
+    assert offline == ['secnd']
+    assert 'failed' not in capsys.readouterr().out
+    # remembered in the state backend, so a fresh registry (e.g. another shard) doesn't ask again
+    speedrunapi.games = GameRegistry()
+    assert find('secnd towr') == ('azuredreams', 'Second Tower')
+    assert offline == ['secnd']
+
+
+def test_no_confident_match_anywhere_asks_what_was_meant(offline):
+    with pytest.raises(CategoryNotFoundError):
+        find('zzzz qqqq')
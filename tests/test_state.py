@@ -0,0 +1,36 @@
+import sqlite3
+import time
+
+from common.state import SqliteBackend
+
+
+def test_values_are_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'state.db')
+    first, second = SqliteBackend(path), SqliteBackend(path)
+    first.set_many('cache', [('a', [1, 2]), ('b', {'c': 3})])
+    assert second.get('cache', 'a') == [1, 2]
+    assert second.items('cache') == [('a', [1, 2]), ('b', {'c': 3})]
+    second.delete('cache', 'a')
+    assert first.get('cache', 'a') is None
+
+
+def test_a_locked_database_does_not_hold_up_the_caller(tmp_path):
+    path = str(tmp_path / 'state.db')
+    backend, other = SqliteBackend(path), SqliteBackend(path)
+    backend.set('cache', 'old', 1)
+    # another process in the middle of a long write
+    writer = sqlite3.connect(path)
+    writer.execute('BEGIN IMMEDIATE')
+    start = time.perf_counter()
+    backend.set('cache', 'new', 2)
+    backend.delete('cache', 'old')
+    assert time.perf_counter() - start < 1
+    # this process sees its own writes straight away, the others once the lock is free
+    assert backend.get('cache', 'new') == 2
+    assert backend.get('cache', 'old') is None
+    assert backend.items('cache') == [('new', 2)]
+    assert other.get('cache', 'new') is None
+    writer.rollback()
+    assert backend.get('cache', 'new') == 2
+    assert other.get('cache', 'new') == 2
+    assert other.get('cache', 'old') is None
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import curry_bot
+from discord_tools.fakes import FakeChannel, FakeContext, FakeMessage
+from discord_tools.timed_script import ScriptScheduler, TimedScript
+
+
+def test_script_sends_steps_in_order():
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(TimedScript('test', [('one', 0.01), ('two', 0.01), ('three', 0)]).play(send))
+    assert sent == ['one', 'two', 'three']
+
+
+def test_scheduler_caps_scripts_per_channel_and_cancels_by_name():
+    async def run():
+        async def send(message):
+            pass
+
+        scheduler = ScriptScheduler(2)
+        long_script = TimedScript('long', [('tick', 10)])
+        assert scheduler.start(1, long_script, send) is not None
+        assert scheduler.start(1, TimedScript('other', [('tick', 10)]), send) is not None
+        assert scheduler.start(1, long_script, send) is None
+        # another channel has its own cap
+        assert scheduler.start(2, long_script, send) is not None
+        assert scheduler.cancel(1, 'long') == 1
+        await asyncio.sleep(0.01)
+        assert scheduler.running(1) == 1
+        assert scheduler.running(1, 'long') == 0
+        assert scheduler.cancel(1) + scheduler.cancel(2) == 2
+        await asyncio.sleep(0.01)
+        assert scheduler.running(1) == scheduler.running(2) == 0
+
+    asyncio.run(run())
+
+
+def test_commands_keep_responding_while_a_countdown_runs(outbox):
+    async def run():
+        curry_bot.create_bot()
+        countdown = FakeMessage('!countdown 10', channel=FakeChannel(1))
+        await curry_bot.countdown.callback(FakeContext(countdown), '10')
+        latencies = []
+        for channel_id in range(2, 7):
+            await asyncio.sleep(0.2)
+            hello = FakeMessage('!hello', channel=FakeChannel(channel_id))
+            start = time.perf_counter()
+            await curry_bot.hello.callback(FakeContext(hello))
+            # the reply is queued; wait for it to reach the channel
+            await asyncio.wait_for(outbox.send(hello.channel, 'flush'), 1)
+            latencies.append(time.perf_counter() - start)
+        assert curry_bot.scheduler.running(countdown.channel.id, 'countdown') == 1
+        await curry_bot.countdown.callback(FakeContext(FakeMessage('!countdown stop', channel=countdown.channel)), 'stop')
+        await asyncio.sleep(0.01)
+        assert curry_bot.scheduler.running(countdown.channel.id) == 0
+        return latencies, countdown.channel.messages
+
+    latencies, countdown_messages = asyncio.run(run())
+    assert max(latencies) < 0.1
+    # the countdown had ticked for about a second when it was stopped, so it never reached "Go!"
+    assert 1 <= len(countdown_messages) < 10
+    assert not any('Go!' in message for message in countdown_messages)
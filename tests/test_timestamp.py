@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from benchmarks.timestamp import OldTimestamp, random_milliseconds
+from common.common import Timestamp
+
+SAMPLES = 20000
+
+
+@pytest.fixture
+def rng():
+    return random.Random(0)
+
+
+def test_formatting_matches_the_old_timestamp(rng):
+    for _ in range(SAMPLES):
+        ms = random_milliseconds(rng)
+        text = str(OldTimestamp.from_milliseconds(ms))
+        assert str(Timestamp.from_milliseconds(ms)) == text, ms
+        # speedrun.com times come in as float seconds
+        assert Timestamp.format_many([ms / 1000 * 1000]) == [text], ms
+
+
+def test_parsing_round_trips(rng):
+    for _ in range(SAMPLES):
+        ms = random_milliseconds(rng)
+        text = str(OldTimestamp.from_milliseconds(ms))
+        assert Timestamp(text).ms == ms, text
+        assert str(Timestamp(text)) == str(OldTimestamp(text)), text
+
+
+@pytest.mark.parametrize('text', ['3h 53m 233s 380ms', '1m 1m 5s', '500ms 2h', '7s banana 3m', ''])
+def test_unusual_layouts_parse_like_the_old_timestamp(text):
+    # the old one kept each field as written, e.g. 233s, where the new one carries over into minutes
+    old = OldTimestamp(text)
+    assert Timestamp(text).ms == ((old.hours * 60 + old.minutes) * 60 + old.seconds) * 1000 + old.milliseconds
+
+
+def test_ordering_and_arithmetic_match_the_old_timestamp(rng):
+    for _ in range(SAMPLES):
+        a, b = random_milliseconds(rng), random_milliseconds(rng)
+        assert (Timestamp.from_milliseconds(a) < Timestamp.from_milliseconds(b)) == \
+            (OldTimestamp.from_milliseconds(a) < OldTimestamp.from_milliseconds(b)), (a, b)
+        assert Timestamp.from_milliseconds(a) + Timestamp.from_milliseconds(b) - Timestamp.from_milliseconds(b) \
+            == Timestamp.from_milliseconds(a)